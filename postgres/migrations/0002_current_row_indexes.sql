@@ -0,0 +1,24 @@
+-- 0002_current_row_indexes.sql
+-- Partial indexes on current dimension rows for the loader's natural-key
+-- lookups, plus the date and status columns the planner and dashboards filter on.
+
+CREATE INDEX IF NOT EXISTS ix_dim_book_isbn13_current
+    ON dim_book (primary_isbn13) WHERE is_current;
+
+CREATE INDEX IF NOT EXISTS ix_dim_list_list_id_current
+    ON dim_list (list_id) WHERE is_current;
+
+CREATE INDEX IF NOT EXISTS ix_dim_publisher_name_current
+    ON dim_publisher (publisher_name) WHERE is_current;
+
+CREATE INDEX IF NOT EXISTS ix_dim_book_publisher_key
+    ON dim_book (publisher_key);
+
+CREATE INDEX IF NOT EXISTS ix_dim_date_full_date
+    ON dim_date (full_date);
+
+CREATE INDEX IF NOT EXISTS ix_dim_date_year_quarter
+    ON dim_date (year, quarter);
+
+CREATE INDEX IF NOT EXISTS ix_load_status_bestsellers_date
+    ON load_status (bestsellers_date, updated_at DESC);
@@ -0,0 +1,109 @@
+-- 0003_partition_fact_tables.sql
+-- Range-partition both fact tables by year on date_key (YYYYMMDD). Primary keys
+-- gain date_key because unique constraints on a partitioned table must include
+-- the partition key; uk_book_list_date and uk_publisher_date_list already do.
+
+-- Keep yearly partitions for both fact tables in place. Rows that already
+-- landed in the DEFAULT partition for a new year are moved into it.
+CREATE OR REPLACE FUNCTION ensure_fact_partitions(from_year INT, to_year INT)
+RETURNS VOID AS $$
+DECLARE
+    parent TEXT;
+    default_name TEXT;
+    partition_name TEXT;
+    yr INT;
+    lower_key INT;
+    upper_key INT;
+    has_rows BOOLEAN;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['fact_book_rankings', 'fact_publisher_performance'] LOOP
+        default_name := parent || '_default';
+        FOR yr IN from_year..to_year LOOP
+            partition_name := parent || '_y' || yr;
+            CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+            lower_key := yr * 10000;
+            upper_key := (yr + 1) * 10000;
+            EXECUTE format(
+                'SELECT EXISTS (SELECT 1 FROM %I WHERE date_key >= %s AND date_key < %s)',
+                default_name, lower_key, upper_key
+            ) INTO has_rows;
+
+            IF has_rows THEN
+                EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, default_name);
+            END IF;
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%s) TO (%s)',
+                partition_name, parent, lower_key, upper_key
+            );
+            IF has_rows THEN
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I WHERE date_key >= %s AND date_key < %s RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved',
+                    default_name, lower_key, upper_key, parent
+                );
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I DEFAULT', parent, default_name);
+            END IF;
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- fact_book_rankings
+ALTER TABLE fact_book_rankings RENAME TO fact_book_rankings_unpartitioned;
+ALTER TABLE fact_book_rankings_unpartitioned
+    RENAME CONSTRAINT fact_book_rankings_pkey TO fact_book_rankings_unpartitioned_pkey;
+ALTER TABLE fact_book_rankings_unpartitioned
+    RENAME CONSTRAINT uk_book_list_date TO uk_book_list_date_unpartitioned;
+
+CREATE TABLE fact_book_rankings (
+    ranking_key INT NOT NULL DEFAULT nextval('fact_book_rankings_ranking_key_seq'),
+    date_key INT NOT NULL REFERENCES dim_date(date_key),
+    book_key INT REFERENCES dim_book(book_key),
+    list_key INT REFERENCES dim_list(list_key),
+    rank INT NOT NULL,
+    price DECIMAL(10,2),
+    CONSTRAINT fact_book_rankings_pkey PRIMARY KEY (ranking_key, date_key),
+    CONSTRAINT uk_book_list_date UNIQUE (date_key, book_key, list_key)
+) PARTITION BY RANGE (date_key);
+ALTER SEQUENCE fact_book_rankings_ranking_key_seq OWNED BY fact_book_rankings.ranking_key;
+CREATE TABLE fact_book_rankings_default PARTITION OF fact_book_rankings DEFAULT;
+
+-- fact_publisher_performance
+ALTER TABLE fact_publisher_performance RENAME TO fact_publisher_performance_unpartitioned;
+ALTER TABLE fact_publisher_performance_unpartitioned
+    RENAME CONSTRAINT fact_publisher_performance_pkey TO fact_publisher_performance_unpartitioned_pkey;
+ALTER TABLE fact_publisher_performance_unpartitioned
+    RENAME CONSTRAINT uk_publisher_date_list TO uk_publisher_date_list_unpartitioned;
+
+CREATE TABLE fact_publisher_performance (
+    performance_key INT NOT NULL DEFAULT nextval('fact_publisher_performance_performance_key_seq'),
+    publisher_key INT REFERENCES dim_publisher(publisher_key),
+    date_key INT NOT NULL REFERENCES dim_date(date_key),
+    list_key INT REFERENCES dim_list(list_key),
+    quarter INT,
+    year INT,
+    total_points INT,
+    books_in_top_5 INT,
+    rank_1_count INT,
+    rank_2_count INT,
+    rank_3_count INT,
+    rank_4_count INT,
+    rank_5_count INT,
+    CONSTRAINT fact_publisher_performance_pkey PRIMARY KEY (performance_key, date_key),
+    CONSTRAINT uk_publisher_date_list UNIQUE (publisher_key, date_key, list_key)
+) PARTITION BY RANGE (date_key);
+ALTER SEQUENCE fact_publisher_performance_performance_key_seq
+    OWNED BY fact_publisher_performance.performance_key;
+CREATE TABLE fact_publisher_performance_default PARTITION OF fact_publisher_performance DEFAULT;
+
+-- NYT overview history starts in 2008
+SELECT ensure_fact_partitions(2008, EXTRACT(YEAR FROM CURRENT_DATE)::INT + 1);
+
+INSERT INTO fact_book_rankings
+SELECT * FROM fact_book_rankings_unpartitioned WHERE date_key IS NOT NULL;
+INSERT INTO fact_publisher_performance
+SELECT * FROM fact_publisher_performance_unpartitioned WHERE date_key IS NOT NULL;
+
+DROP TABLE fact_book_rankings_unpartitioned;
+DROP TABLE fact_publisher_performance_unpartitioned;
@@ -0,0 +1,114 @@
+-- 0004_dashboard_rollups.sql
+-- Materialized rollups for the Metabase dashboards. Each has a unique index
+-- so the loader can REFRESH MATERIALIZED VIEW CONCURRENTLY without blocking
+-- dashboard reads; see src/etl/rollups.py for which loads refresh which view.
+
+-- Publisher points per quarter, ranked within the quarter
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_publisher_quarterly_leaderboard AS
+SELECT
+    pp.year,
+    pp.quarter,
+    'Q' || pp.quarter || ' ' || pp.year AS quarter_name,
+    pp.publisher_key,
+    p.publisher_name,
+    SUM(pp.total_points) AS total_points,
+    SUM(pp.books_in_top_5) AS books_in_top_5,
+    SUM(pp.rank_1_count) AS rank_1_count,
+    RANK() OVER (
+        PARTITION BY pp.year, pp.quarter
+        ORDER BY SUM(pp.total_points) DESC
+    ) AS quarterly_rank
+FROM fact_publisher_performance pp
+JOIN dim_publisher p ON pp.publisher_key = p.publisher_key
+GROUP BY pp.year, pp.quarter, pp.publisher_key, p.publisher_name;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_publisher_quarterly_leaderboard
+    ON mv_publisher_quarterly_leaderboard (year, quarter, publisher_key);
+CREATE INDEX IF NOT EXISTS ix_mv_publisher_quarterly_leaderboard_rank
+    ON mv_publisher_quarterly_leaderboard (year, quarter, quarterly_rank);
+
+-- Publisher points per year, ranked within the year
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_publisher_yearly_leaderboard AS
+SELECT
+    pp.year,
+    pp.publisher_key,
+    p.publisher_name,
+    SUM(pp.total_points) AS total_points,
+    SUM(pp.books_in_top_5) AS books_in_top_5,
+    SUM(pp.rank_1_count) AS rank_1_count,
+    RANK() OVER (
+        PARTITION BY pp.year
+        ORDER BY SUM(pp.total_points) DESC
+    ) AS yearly_rank
+FROM fact_publisher_performance pp
+JOIN dim_publisher p ON pp.publisher_key = p.publisher_key
+GROUP BY pp.year, pp.publisher_key, p.publisher_name;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_publisher_yearly_leaderboard
+    ON mv_publisher_yearly_leaderboard (year, publisher_key);
+CREATE INDEX IF NOT EXISTS ix_mv_publisher_yearly_leaderboard_rank
+    ON mv_publisher_yearly_leaderboard (year, yearly_rank);
+
+-- Weeks on any list, weeks at #1 and best rank per book (ISBN), across all
+-- SCD versions; title and author come from the latest version
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_book_list_stats AS
+SELECT
+    b.primary_isbn13,
+    (ARRAY_AGG(b.title ORDER BY b.book_key DESC))[1] AS title,
+    (ARRAY_AGG(b.author ORDER BY b.book_key DESC))[1] AS author,
+    COUNT(DISTINCT f.date_key) AS weeks_on_list,
+    COUNT(DISTINCT f.date_key) FILTER (WHERE f.rank = 1) AS weeks_at_number_one,
+    MIN(f.rank) AS best_rank,
+    MIN(d.full_date) AS first_appearance,
+    MAX(d.full_date) AS last_appearance
+FROM fact_book_rankings f
+JOIN dim_book b ON f.book_key = b.book_key
+JOIN dim_date d ON f.date_key = d.date_key
+GROUP BY b.primary_isbn13;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_book_list_stats
+    ON mv_book_list_stats (primary_isbn13);
+CREATE INDEX IF NOT EXISTS ix_mv_book_list_stats_weeks
+    ON mv_book_list_stats (weeks_on_list DESC);
+
+-- Per list and publication: books ranked, books new since the list's
+-- previous publication, and the resulting churn rate
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_list_churn AS
+WITH appearances AS (
+    SELECT DISTINCT l.list_id, d.full_date, b.primary_isbn13
+    FROM fact_book_rankings f
+    JOIN dim_list l ON f.list_key = l.list_key
+    JOIN dim_book b ON f.book_key = b.book_key
+    JOIN dim_date d ON f.date_key = d.date_key
+),
+list_dates AS (
+    SELECT
+        list_id,
+        full_date,
+        LAG(full_date) OVER (PARTITION BY list_id ORDER BY full_date) AS previous_date
+    FROM (SELECT DISTINCT list_id, full_date FROM appearances) published
+)
+SELECT
+    ld.list_id,
+    cl.list_name,
+    ld.full_date,
+    ld.previous_date,
+    COUNT(*) AS books_on_list,
+    COUNT(*) FILTER (WHERE ld.previous_date IS NOT NULL AND prev.primary_isbn13 IS NULL) AS new_entries,
+    ROUND(
+        COUNT(*) FILTER (WHERE ld.previous_date IS NOT NULL AND prev.primary_isbn13 IS NULL)::numeric
+        / COUNT(*), 4
+    ) AS churn_rate
+FROM list_dates ld
+JOIN appearances a
+    ON a.list_id = ld.list_id AND a.full_date = ld.full_date
+LEFT JOIN appearances prev
+    ON prev.list_id = ld.list_id
+    AND prev.full_date = ld.previous_date
+    AND prev.primary_isbn13 = a.primary_isbn13
+LEFT JOIN dim_list cl
+    ON cl.list_id = ld.list_id AND cl.is_current
+GROUP BY ld.list_id, cl.list_name, ld.full_date, ld.previous_date;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_list_churn
+    ON mv_list_churn (list_id, full_date);
@@ -0,0 +1,27 @@
+-- 0005_load_queue.sql
+-- Work queue for distributed backfills. A coordinator enqueues requested
+-- dates; workers claim them with FOR UPDATE SKIP LOCKED and extend their
+-- lease with heartbeats. Expired leases are handed back to PENDING.
+
+CREATE TABLE IF NOT EXISTS load_queue (
+    requested_date DATE PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING'
+        CHECK (status IN ('PENDING', 'CLAIMED', 'DONE', 'FAILED')),
+    attempts INT NOT NULL DEFAULT 0,
+    claimed_by VARCHAR(255),
+    claimed_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    lease_expires_at TIMESTAMP,
+    last_error TEXT,
+    enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_load_queue_pending
+    ON load_queue (requested_date) WHERE status = 'PENDING';
+
+CREATE INDEX IF NOT EXISTS ix_load_queue_lease
+    ON load_queue (lease_expires_at) WHERE status = 'CLAIMED';
+
+CREATE INDEX IF NOT EXISTS ix_load_status_requested_date
+    ON load_status (requested_date, status);
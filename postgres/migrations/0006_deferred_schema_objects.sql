@@ -0,0 +1,12 @@
+-- 0006_deferred_schema_objects.sql
+-- Secondary indexes and foreign keys dropped for a fast initial backfill,
+-- with the definitions needed to recreate them. A row outlives a crashed
+-- backfill, so the next run (or restore_constraints) puts the object back.
+
+CREATE TABLE IF NOT EXISTS deferred_schema_objects (
+    object_name VARCHAR(255) PRIMARY KEY,
+    table_name VARCHAR(255) NOT NULL,
+    kind VARCHAR(20) NOT NULL CHECK (kind IN ('index', 'foreign_key')),
+    definition TEXT NOT NULL,
+    deferred_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,18 @@
+-- 0007_load_completed_notify.sql
+-- Announce every COMPLETED load_status row on the load_status_completed
+-- channel. NOTIFY is delivered on commit, so listeners (the read API's result
+-- cache) only hear about data that is visible.
+
+CREATE OR REPLACE FUNCTION notify_load_completed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('load_status_completed', NEW.bestsellers_date::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_load_status_completed ON load_status;
+CREATE TRIGGER trg_load_status_completed
+    AFTER INSERT OR UPDATE OF status ON load_status
+    FOR EACH ROW
+    WHEN (NEW.status = 'COMPLETED')
+    EXECUTE FUNCTION notify_load_completed();
@@ -0,0 +1,51 @@
+-- 0008_close_duplicate_current_rows.sql
+-- The original row-by-row loader inserted new dimension versions without
+-- closing the old ones, leaving several is_current rows per natural key. The
+-- SCD merges join on the current row and fail on such duplicates ("ON
+-- CONFLICT DO UPDATE command cannot affect row a second time"), so keep only
+-- the newest current row per key and end the others where the next one starts.
+
+WITH ranked AS (
+    SELECT
+        list_key,
+        ROW_NUMBER() OVER w_desc AS newest_first,
+        LEAD(effective_start_date) OVER w_asc AS next_start_date
+    FROM dim_list
+    WHERE is_current = TRUE
+    WINDOW w_desc AS (PARTITION BY list_id ORDER BY effective_start_date DESC, list_key DESC),
+           w_asc AS (PARTITION BY list_id ORDER BY effective_start_date, list_key)
+)
+UPDATE dim_list d
+SET is_current = FALSE, effective_end_date = r.next_start_date
+FROM ranked r
+WHERE d.list_key = r.list_key AND r.newest_first > 1;
+
+WITH ranked AS (
+    SELECT
+        book_key,
+        ROW_NUMBER() OVER w_desc AS newest_first,
+        LEAD(effective_start_date) OVER w_asc AS next_start_date
+    FROM dim_book
+    WHERE is_current = TRUE
+    WINDOW w_desc AS (PARTITION BY primary_isbn13 ORDER BY effective_start_date DESC, book_key DESC),
+           w_asc AS (PARTITION BY primary_isbn13 ORDER BY effective_start_date, book_key)
+)
+UPDATE dim_book d
+SET is_current = FALSE, effective_end_date = r.next_start_date
+FROM ranked r
+WHERE d.book_key = r.book_key AND r.newest_first > 1;
+
+WITH ranked AS (
+    SELECT
+        publisher_key,
+        ROW_NUMBER() OVER w_desc AS newest_first,
+        LEAD(effective_start_date) OVER w_asc AS next_start_date
+    FROM dim_publisher
+    WHERE is_current = TRUE
+    WINDOW w_desc AS (PARTITION BY publisher_name ORDER BY effective_start_date DESC, publisher_key DESC),
+           w_asc AS (PARTITION BY publisher_name ORDER BY effective_start_date, publisher_key)
+)
+UPDATE dim_publisher d
+SET is_current = FALSE, effective_end_date = r.next_start_date
+FROM ranked r
+WHERE d.publisher_key = r.publisher_key AND r.newest_first > 1;
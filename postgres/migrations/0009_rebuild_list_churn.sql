@@ -0,0 +1,54 @@
+-- 0009_rebuild_list_churn.sql
+-- mv_list_churn as first created by 0004 joined every current dim_list row,
+-- so a list with more than one current row doubled books_on_list or produced
+-- duplicate (list_id, full_date) rows that break REFRESH ... CONCURRENTLY.
+-- 0004 is left as applied so its checksum stays stable; this migration
+-- recreates the view with one name per list on every database.
+
+DROP MATERIALIZED VIEW IF EXISTS mv_list_churn;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_list_churn AS
+WITH appearances AS (
+    SELECT DISTINCT l.list_id, d.full_date, b.primary_isbn13
+    FROM fact_book_rankings f
+    JOIN dim_list l ON f.list_key = l.list_key
+    JOIN dim_book b ON f.book_key = b.book_key
+    JOIN dim_date d ON f.date_key = d.date_key
+),
+list_dates AS (
+    SELECT
+        list_id,
+        full_date,
+        LAG(full_date) OVER (PARTITION BY list_id ORDER BY full_date) AS previous_date
+    FROM (SELECT DISTINCT list_id, full_date FROM appearances) published
+),
+-- One name per list, so lists with several current rows cannot fan out
+list_names AS (
+    SELECT DISTINCT ON (list_id) list_id, list_name
+    FROM dim_list
+    ORDER BY list_id, is_current DESC, effective_start_date DESC, list_key DESC
+)
+SELECT
+    ld.list_id,
+    cl.list_name,
+    ld.full_date,
+    ld.previous_date,
+    COUNT(*) AS books_on_list,
+    COUNT(*) FILTER (WHERE ld.previous_date IS NOT NULL AND prev.primary_isbn13 IS NULL) AS new_entries,
+    ROUND(
+        COUNT(*) FILTER (WHERE ld.previous_date IS NOT NULL AND prev.primary_isbn13 IS NULL)::numeric
+        / COUNT(*), 4
+    ) AS churn_rate
+FROM list_dates ld
+JOIN appearances a
+    ON a.list_id = ld.list_id AND a.full_date = ld.full_date
+LEFT JOIN appearances prev
+    ON prev.list_id = ld.list_id
+    AND prev.full_date = ld.previous_date
+    AND prev.primary_isbn13 = a.primary_isbn13
+LEFT JOIN list_names cl
+    ON cl.list_id = ld.list_id
+GROUP BY ld.list_id, cl.list_name, ld.full_date, ld.previous_date;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_list_churn
+    ON mv_list_churn (list_id, full_date);
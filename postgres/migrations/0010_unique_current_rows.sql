@@ -0,0 +1,22 @@
+-- 0010_unique_current_rows.sql
+-- At most one current row per natural key. Concurrent loaders serialize
+-- their dimension merges on an advisory lock (see load.py); these constraints
+-- make a loader that bypasses it fail instead of leaving duplicate current
+-- rows behind. They are deferred to commit because each SCD merge inserts the
+-- new current row before its `closed` CTE retires the old one. Runs after
+-- 0008, which closed the duplicates left by the original loader.
+
+ALTER TABLE dim_book
+    ADD CONSTRAINT ux_dim_book_isbn13_current
+    EXCLUDE USING btree (primary_isbn13 WITH =) WHERE (is_current)
+    DEFERRABLE INITIALLY DEFERRED;
+
+ALTER TABLE dim_list
+    ADD CONSTRAINT ux_dim_list_list_id_current
+    EXCLUDE USING btree (list_id WITH =) WHERE (is_current)
+    DEFERRABLE INITIALLY DEFERRED;
+
+ALTER TABLE dim_publisher
+    ADD CONSTRAINT ux_dim_publisher_name_current
+    EXCLUDE USING btree (publisher_name WITH =) WHERE (is_current)
+    DEFERRABLE INITIALLY DEFERRED;
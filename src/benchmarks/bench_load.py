@@ -0,0 +1,68 @@
+# bench_load.py
+"""Compare rows/sec of the bulk and row-by-row load_data paths.
+
+Runs against a disposable database created on the configured server:
+
+    python -m src.benchmarks.bench_load --lists 18 --books-per-list 15
+"""
+import argparse
+import time
+from src.benchmarks.payloads import generate_overview
+from src.benchmarks.suite import disposable_database
+from src.etl.transform import transform_data
+from src.etl.load import load_data
+from src.etl.database import get_db_connection
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def count_rows(transformed):
+    return sum(len(rows) for rows in transformed.values())
+
+
+def bench_mode(conn, mode, published_date, isbn_offset, args):
+    raw_data = generate_overview(
+        published_date, lists=args.lists, books_per_list=args.books_per_list,
+        publishers=args.publishers, isbn_offset=isbn_offset
+    )
+    transformed = transform_data(raw_data)
+    rows = count_rows(transformed)
+
+    started = time.perf_counter()
+    load_data(transformed, conn, mode=mode)
+    elapsed = time.perf_counter() - started
+    return rows, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lists', type=int, default=18)
+    parser.add_argument('--books-per-list', type=int, default=15)
+    parser.add_argument('--publishers', type=int, default=60)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    with disposable_database() as dbname:
+        conn = get_db_connection(dbname=dbname)
+        try:
+            # Each round uses its own published date and ISBN range so both
+            # paths insert fresh rows rather than hitting ON CONFLICT.
+            for mode_index, mode in enumerate(('row', 'bulk')):
+                total_rows = total_elapsed = 0
+                for round_index in range(args.rounds):
+                    published_date = f"{2021 + mode_index}-01-{round_index + 1:02d}"
+                    offset = (mode_index * args.rounds + round_index) * args.lists * args.books_per_list
+                    rows, elapsed = bench_mode(conn, mode, published_date, offset, args)
+                    total_rows += rows
+                    total_elapsed += elapsed
+                logger.info(
+                    "%4s: %d rows in %.3fs (%.0f rows/sec)",
+                    mode, total_rows, total_elapsed, total_rows / total_elapsed
+                )
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# payloads.py
+import random
+from datetime import datetime, timedelta
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _book(isbn, rank, publisher, timestamp):
+    return {
+        'age_group': '',
+        'author': f"Author {isbn % 997}",
+        'contributor': f"by Author {isbn % 997}",
+        'contributor_note': '',
+        'created_date': timestamp,
+        'description': f"Synthetic description for book {isbn}.",
+        'price': '0.00',
+        'primary_isbn10': f"{isbn % 10 ** 10:010d}",
+        'primary_isbn13': f"{isbn:013d}",
+        'publisher': publisher,
+        'rank': rank,
+        'title': f"BOOK {isbn}",
+        'updated_date': timestamp
+    }
+
+
+def _overview(published, book_lists):
+    return {
+        'status': 'OK',
+        'num_results': sum(len(book_list['books']) for book_list in book_lists),
+        'results': {
+            'bestsellers_date': (published - timedelta(days=15)).strftime('%Y-%m-%d'),
+            'published_date': published.strftime('%Y-%m-%d'),
+            'published_date_description': 'latest',
+            'previous_published_date': (published - timedelta(days=7)).strftime('%Y-%m-%d'),
+            'next_published_date': (published + timedelta(days=7)).strftime('%Y-%m-%d'),
+            'lists': book_lists
+        }
+    }
+
+
+def _list(list_index, books):
+    return {
+        'list_id': 1000 + list_index,
+        'list_name': f"Synthetic List {list_index}",
+        'list_name_encoded': f"synthetic-list-{list_index}",
+        'display_name': f"Synthetic List {list_index}",
+        'updated': 'WEEKLY',
+        'list_image': None,
+        'books': books
+    }
+
+
+def generate_overview(published_date, lists=18, books_per_list=15, publishers=60,
+                      isbn_offset=0, seed=0):
+    """Build a synthetic NYT lists/overview.json payload for a published date."""
+    rng = random.Random(seed)
+    published = datetime.strptime(published_date, '%Y-%m-%d')
+    timestamp = published.strftime(TIMESTAMP_FORMAT)
+
+    book_lists = []
+    for list_index in range(lists):
+        books = [
+            _book(isbn_offset + list_index * books_per_list + rank, rank,
+                  f"Publisher {rng.randrange(publishers)}", timestamp)
+            for rank in range(1, books_per_list + 1)
+        ]
+        book_lists.append(_list(list_index, books))
+    return _overview(published, book_lists)
+
+
+def generate_weeks(start_date, weeks, lists=18, books_per_list=15, publishers=60,
+                   churn=0.2, description_change_rate=0.02, seed=0):
+    """Yield consecutive weekly overview payloads with realistic list churn.
+
+    Each week roughly `churn` of every list is replaced by new titles and the
+    survivors are reshuffled, a small share of books get a new description
+    (an SCD Type 2 change), and publishers are drawn from a fixed pool of
+    `publishers` names with a long-tail skew.
+    """
+    rng = random.Random(seed)
+    published = datetime.strptime(start_date, '%Y-%m-%d')
+    next_isbn = 9_780_000_000_000
+    publisher_names = [f"Publisher {i}" for i in range(publishers)]
+    # Book state: isbn -> (publisher, description revision)
+    books = {}
+    standings = []
+    for _ in range(lists):
+        isbns = []
+        for _ in range(books_per_list):
+            next_isbn += 1
+            books[next_isbn] = [publisher_names[int(rng.paretovariate(1.2)) % publishers], 0]
+            isbns.append(next_isbn)
+        standings.append(isbns)
+
+    for _ in range(weeks):
+        timestamp = published.strftime(TIMESTAMP_FORMAT)
+        book_lists = []
+        for list_index, isbns in enumerate(standings):
+            survivors = [isbn for isbn in isbns if rng.random() >= churn]
+            while len(survivors) < books_per_list:
+                next_isbn += 1
+                books[next_isbn] = [publisher_names[int(rng.paretovariate(1.2)) % publishers], 0]
+                survivors.append(next_isbn)
+            rng.shuffle(survivors)
+            standings[list_index] = survivors
+
+            list_books = []
+            for rank, isbn in enumerate(survivors, start=1):
+                state = books[isbn]
+                if rng.random() < description_change_rate:
+                    state[1] += 1
+                book = _book(isbn, rank, state[0], timestamp)
+                book['description'] += f" Revision {state[1]}."
+                list_books.append(book)
+            book_lists.append(_list(list_index, list_books))
+
+        yield _overview(published, book_lists)
+        published += timedelta(days=7)
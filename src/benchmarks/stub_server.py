@@ -0,0 +1,258 @@
+# stub_server.py
+"""Local stand-in for the NYT Books lists/overview.json endpoint.
+
+Serves synthetic weekly payloads with configurable latency, 429 bursts with
+Retry-After, 5xx errors, truncated bodies and per-key quotas, so extraction
+and its retry policy can be load-tested without spending API quota:
+
+    python -m src.benchmarks.stub_server --port 8081 --latency lognormal:-2.0,0.5 \\
+        --throttle-rate 0.05 --error-rate 0.02 --truncate-rate 0.01
+    BASE_URL=http://localhost:8081/svc/books/v3/lists/overview.json \\
+        python -m src.scripts.run_historical_load
+
+GET /stats returns the request counters as JSON.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from src.benchmarks.payloads import generate_overview, generate_weeks
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+OVERVIEW_PATH = '/svc/books/v3/lists/overview.json'
+
+# The real API allows 5 requests per minute and 500 per day per key
+DEFAULT_MINUTE_QUOTA = 5
+DEFAULT_DAILY_QUOTA = 500
+
+
+def parse_latency(spec):
+    """Turn a latency spec into a function returning a delay in seconds.
+
+    Specs: 'none', 'fixed:S', 'uniform:LOW,HIGH', 'exponential:MEAN' or
+    'lognormal:MU,SIGMA' (parameters of the underlying normal, in log seconds).
+    """
+    kind, _, args = spec.partition(':')
+    values = [float(value) for value in args.split(',')] if args else []
+    if kind == 'none':
+        return lambda rng: 0.0
+    if kind == 'fixed':
+        return lambda rng: values[0]
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'exponential':
+        return lambda rng: rng.expovariate(1 / values[0])
+    if kind == 'lognormal':
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class StubBehaviour:
+    """Quotas, injected faults and payloads shared by every request thread."""
+
+    def __init__(self, args):
+        self.latency = parse_latency(args.latency)
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.counters = Counter()
+        self.keys = set(args.keys.split(',')) if args.keys else None
+        self.minute_windows = {}
+        self.daily_counts = Counter()
+        self.day = datetime.now().date()
+        self.throttle_left = 0
+        self.retry_not_before = {}
+        self.start = datetime.strptime(args.start_date, '%Y-%m-%d')
+        # Realistic week-to-week churn for the configured range; dates outside
+        # it get an independent payload for their publication date
+        self.payloads = {
+            raw_data['results']['published_date']: json.dumps(raw_data).encode('utf-8')
+            for raw_data in generate_weeks(
+                args.start_date, args.weeks, lists=args.lists,
+                books_per_list=args.books_per_list, publishers=args.publishers, seed=args.seed
+            )
+        }
+
+    def publication_date(self, requested):
+        """Snap a requested date back to the weekly publication on or before it."""
+        days = (datetime.strptime(requested, '%Y-%m-%d') - self.start).days
+        return (self.start + timedelta(days=7 * math.floor(days / 7))).strftime('%Y-%m-%d')
+
+    def payload(self, published_date):
+        body = self.payloads.get(published_date)
+        if body is None:
+            body = json.dumps(generate_overview(
+                published_date, lists=self.args.lists, books_per_list=self.args.books_per_list,
+                publishers=self.args.publishers, seed=self.args.seed
+            )).encode('utf-8')
+        return body
+
+    def _over_quota(self, api_key, now):
+        """Seconds until api_key may call again, or None if it is within quota."""
+        if datetime.now().date() != self.day:
+            self.day = datetime.now().date()
+            self.daily_counts.clear()
+        if self.args.daily_quota and self.daily_counts[api_key] >= self.args.daily_quota:
+            tomorrow = datetime.combine(self.day + timedelta(days=1), datetime.min.time())
+            return (tomorrow - datetime.now()).total_seconds()
+        window = self.minute_windows.setdefault(api_key, deque())
+        while window and now - window[0] >= 60:
+            window.popleft()
+        if self.args.minute_quota and len(window) >= self.args.minute_quota:
+            return 60 - (now - window[0])
+        window.append(now)
+        self.daily_counts[api_key] += 1
+        return None
+
+    def decide(self, api_key):
+        """Pick (status, retry_after, truncate, delay) for one request."""
+        now = time.monotonic()
+        with self.lock:
+            self.counters['requests'] += 1
+            # A client that honours Retry-After never comes back early
+            if now < self.retry_not_before.get(api_key, 0):
+                self.counters['early_retries'] += 1
+            delay = self.latency(self.rng)
+
+            if self.keys is not None and api_key not in self.keys:
+                return 401, None, False, delay
+            wait = self._over_quota(api_key, now)
+            if wait is not None:
+                self.counters['quota_exceeded'] += 1
+                return self._throttle(api_key, now, max(1, math.ceil(wait)), delay)
+            if self.throttle_left or self.rng.random() < self.args.throttle_rate:
+                self.throttle_left = (self.throttle_left or self.args.throttle_burst) - 1
+                return self._throttle(api_key, now, self.args.retry_after, delay)
+            if self.rng.random() < self.args.error_rate:
+                return self.rng.choice((500, 502, 503)), None, False, delay
+            return 200, None, self.rng.random() < self.args.truncate_rate, delay
+
+    def _throttle(self, api_key, now, retry_after, delay):
+        self.retry_not_before[api_key] = now + retry_after
+        return 429, retry_after, False, delay
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+
+class OverviewHandler(BaseHTTPRequestHandler):
+    """Answers GET overview.json and GET /stats."""
+
+    behaviour = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fault(self, status, message):
+        self._send(status, json.dumps({'fault': {'faultstring': message}}).encode('utf-8'))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            self._send(200, json.dumps(self.behaviour.stats()).encode('utf-8'))
+            return
+        if not url.path.endswith('/lists/overview.json'):
+            self._fault(404, 'Not found')
+            return
+
+        params = parse_qs(url.query)
+        api_key = params.get('api-key', [None])[0]
+        if not api_key:
+            self.behaviour.count('401')
+            self._fault(401, 'Failed to resolve API Key variable request.queryparam.api-key')
+            return
+
+        status, retry_after, truncate, delay = self.behaviour.decide(api_key)
+        time.sleep(delay)
+        self.behaviour.count(str(status) if not truncate else 'truncated')
+        if status == 429:
+            self._send(429, json.dumps({'fault': {'faultstring': 'Rate limit quota violation.'}}).encode('utf-8'),
+                       {'Retry-After': retry_after})
+        elif status != 200:
+            self._fault(status, 'Unauthorized' if status == 401 else 'Internal server error')
+        else:
+            requested = params.get('published_date', [datetime.now().strftime('%Y-%m-%d')])[0]
+            try:
+                body = self.behaviour.payload(self.behaviour.publication_date(requested))
+            except ValueError:
+                self._fault(400, f"Invalid published_date: {requested}")
+                return
+            # A cut-off body with a matching Content-Length, as a proxy that
+            # dropped the upstream connection would serve it
+            self._send(200, body[:len(body) // 2] if truncate else body)
+
+
+def start_stub_server(args, host='127.0.0.1', port=8081):
+    """Serve in a background thread; returns the server (call shutdown() to stop)."""
+    handler = type('StubOverviewHandler', (OverviewHandler,), {'behaviour': StubBehaviour(args)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='stub-server', daemon=True).start()
+    logger.info("Stub NYT API listening on http://%s:%d%s", host, server.server_port, OVERVIEW_PATH)
+    return server
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', default='none',
+                        help="none, fixed:S, uniform:LOW,HIGH, exponential:MEAN or lognormal:MU,SIGMA")
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help="Chance that a request starts a burst of 429s")
+    parser.add_argument('--throttle-burst', type=int, default=3, help="429 responses per burst")
+    parser.add_argument('--retry-after', type=int, default=2, help="Retry-After seconds sent with burst 429s")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Chance of a 500, 502 or 503")
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help="Chance of a truncated 200 body")
+    parser.add_argument('--minute-quota', type=int, default=DEFAULT_MINUTE_QUOTA,
+                        help="Requests per minute per key, 0 for unlimited")
+    parser.add_argument('--daily-quota', type=int, default=DEFAULT_DAILY_QUOTA,
+                        help="Requests per day per key, 0 for unlimited")
+    parser.add_argument('--keys', help="Comma-separated API keys to accept (default: any)")
+    parser.add_argument('--start-date', default='2021-01-03', help="First weekly publication date")
+    parser.add_argument('--weeks', type=int, default=52)
+    parser.add_argument('--lists', type=int, default=18)
+    parser.add_argument('--books-per-list', type=int, default=15)
+    parser.add_argument('--publishers', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    server = start_stub_server(args, args.host, args.port)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        logger.info("Stub server stats: %s", server.RequestHandlerClass.behaviour.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# suite.py
+"""ETL throughput benchmark against a disposable Postgres database.
+
+Creates a scratch database on the configured server, applies the migrations,
+then transforms and loads synthetic weekly payloads, reporting rows/sec,
+per-stage latency, database round trips and peak RSS:
+
+    python -m src.benchmarks.suite --weeks 52 --lists 18 --books-per-list 15 \\
+        --baseline data/benchmarks/baseline.json --max-regression 0.15
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from psycopg2.extensions import cursor as base_cursor
+from src.benchmarks.payloads import generate_weeks
+from src.etl.database import get_db_connection
+from src.etl.key_cache import key_cache
+from src.etl.load import load_data
+from src.etl.migrate import run_migrations
+from src.etl.transform import transform_data
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '../../data/benchmarks')
+
+# Database the scratch database is created from and dropped through
+BENCH_MAINTENANCE_DB = os.getenv('BENCH_MAINTENANCE_DB', 'postgres')
+
+# Metrics checked against the baseline and whether higher values are better
+REGRESSION_METRICS = {
+    'rows_per_sec': True,
+    'transform_p50_ms': False,
+    'load_p50_ms': False,
+    'round_trips_per_payload': False,
+    'peak_rss_mb': False
+}
+
+
+class CountingCursor(base_cursor):
+    """Cursor that counts statements and COPYs sent to the server."""
+
+    round_trips = 0
+
+    def execute(self, query, vars=None):
+        CountingCursor.round_trips += 1
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        CountingCursor.round_trips += len(vars_list)
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        CountingCursor.round_trips += 1
+        return super().copy_expert(sql, file, size)
+
+
+@contextmanager
+def disposable_database(keep=False):
+    """Create a scratch database with the current schema and drop it afterwards."""
+    dbname = f"nyt_bench_{uuid.uuid4().hex[:8]}"
+    admin = get_db_connection(dbname=BENCH_MAINTENANCE_DB)
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute(f'CREATE DATABASE "{dbname}"')
+        logger.info("Created benchmark database %s", dbname)
+
+        conn = get_db_connection(dbname=dbname)
+        try:
+            run_migrations(conn)
+        finally:
+            conn.close()
+
+        # Surrogate keys from any other database are meaningless here
+        key_cache.clear()
+        yield dbname
+    finally:
+        if not keep:
+            with admin.cursor() as cursor:
+                cursor.execute(f'DROP DATABASE IF EXISTS "{dbname}" WITH (FORCE)')
+            logger.info("Dropped benchmark database %s", dbname)
+        admin.close()
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_suite(dbname, args):
+    """Transform and load every synthetic week, returning the result summary."""
+    conn = get_db_connection(dbname=dbname, cursor_factory=CountingCursor)
+    transform_ms = []
+    load_ms = []
+    total_rows = 0
+    CountingCursor.round_trips = 0
+
+    try:
+        payloads = generate_weeks(
+            args.start_date, args.weeks, lists=args.lists, books_per_list=args.books_per_list,
+            publishers=args.publishers, churn=args.churn, seed=args.seed
+        )
+        for raw_data in payloads:
+            started = time.perf_counter()
+            transformed = transform_data(raw_data)
+            transform_ms.append((time.perf_counter() - started) * 1000)
+
+            total_rows += sum(len(rows) for rows in transformed.values())
+
+            started = time.perf_counter()
+            load_data(transformed, conn, mode=args.mode)
+            load_ms.append((time.perf_counter() - started) * 1000)
+    finally:
+        conn.close()
+
+    elapsed_seconds = (sum(transform_ms) + sum(load_ms)) / 1000
+    return {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'parameters': {
+            'mode': args.mode,
+            'weeks': args.weeks,
+            'lists': args.lists,
+            'books_per_list': args.books_per_list,
+            'publishers': args.publishers,
+            'churn': args.churn,
+            'seed': args.seed
+        },
+        'payloads': args.weeks,
+        'rows': total_rows,
+        'elapsed_seconds': round(elapsed_seconds, 3),
+        'rows_per_sec': round(total_rows / elapsed_seconds, 1) if elapsed_seconds else 0.0,
+        'transform_p50_ms': round(statistics.median(transform_ms), 3),
+        'transform_p95_ms': round(percentile(transform_ms, 0.95), 3),
+        'load_p50_ms': round(statistics.median(load_ms), 3),
+        'load_p95_ms': round(percentile(load_ms, 0.95), 3),
+        'round_trips': CountingCursor.round_trips,
+        'round_trips_per_payload': round(CountingCursor.round_trips / args.weeks, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+
+
+def find_regressions(result, baseline, max_regression):
+    """Return a message for every metric that regressed past the threshold."""
+    regressions = []
+    for metric, higher_is_better in REGRESSION_METRICS.items():
+        current, reference = result.get(metric), baseline.get(metric)
+        if not current or not reference:
+            continue
+        change = (current - reference) / reference
+        if (higher_is_better and change < -max_regression) or (not higher_is_better and change > max_regression):
+            regressions.append(f"{metric}: {reference} -> {current} ({change:+.1%})")
+    return regressions
+
+
+def save_result(result, path=None):
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['bulk', 'row'], default='bulk')
+    parser.add_argument('--start-date', default='2021-01-03')
+    parser.add_argument('--weeks', type=int, default=26)
+    parser.add_argument('--lists', type=int, default=18)
+    parser.add_argument('--books-per-list', type=int, default=15)
+    parser.add_argument('--publishers', type=int, default=60)
+    parser.add_argument('--churn', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Where to write the result JSON")
+    parser.add_argument('--baseline', help="Result JSON to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.15,
+                        help="Allowed fractional regression per metric")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Write this run to --baseline instead of comparing")
+    parser.add_argument('--keep-db', action='store_true', help="Do not drop the scratch database")
+    args = parser.parse_args()
+
+    with disposable_database(keep=args.keep_db) as dbname:
+        result = run_suite(dbname, args)
+
+    path = save_result(result, args.output)
+    logger.info("Benchmark result written to %s:\n%s", path, json.dumps(result, indent=2))
+
+    if args.baseline:
+        if args.save_baseline:
+            save_result(result, args.baseline)
+            logger.info("Baseline saved to %s", args.baseline)
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(result, baseline, args.max_regression)
+        if regressions:
+            logger.error("Benchmark regressed past the threshold:\n  %s", "\n  ".join(regressions))
+            return 1
+        logger.info("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+# archive.py
+import gzip
+import mmap
+import os
+import tarfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+import multiprocessing
+from src.etl.pipeline import load_batch
+from src.etl.transform import transform_data
+from src.etl.utils.logger import child_log_queue, configure_child_logging, get_logger, log_context
+
+try:
+    import orjson
+except ImportError:  # the standard library parser is slower but equivalent
+    orjson = None
+    import json
+
+logger = get_logger()
+
+ARCHIVE_WORKERS = int(os.getenv('ARCHIVE_WORKERS', str(os.cpu_count() or 1)))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '26'))  # payloads per transaction
+
+ARCHIVE_SUFFIXES = ('.json', '.json.gz')
+
+
+def parse_json(data):
+    """Parse a JSON document from bytes, a memoryview or an mmap."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+def read_payload(path):
+    """Parse an archived response file; plain JSON is memory-mapped, not copied."""
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rb') as f:
+            return parse_json(f.read())
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return parse_json(view)
+            finally:
+                view.release()
+
+
+def iter_archive(source):
+    """Yield (name, path or bytes) for every archived response under source.
+
+    Directories yield paths, which workers open themselves; tarballs are read
+    sequentially here and yield the member bytes.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.endswith(ARCHIVE_SUFFIXES):
+                    path = os.path.join(root, filename)
+                    yield path, path
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source, 'r:*') as tar:
+            for member in tar:
+                if member.isfile() and member.name.endswith(ARCHIVE_SUFFIXES):
+                    data = tar.extractfile(member).read()
+                    if member.name.endswith('.gz'):
+                        data = gzip.decompress(data)
+                    yield member.name, data
+    else:
+        raise ValueError(f"{source} is neither a directory nor a tarball")
+
+
+def _init_worker(log_queue):
+    # Workers only report problems, through the parent's log file; progress
+    # is logged by the parent
+    configure_child_logging(log_queue, level='WARNING')
+
+
+def _transform_payload(name, source, run_date):
+    """Parse and transform one archived payload in a worker process."""
+    try:
+        raw_data = read_payload(source) if isinstance(source, str) else parse_json(source)
+        results = raw_data.get('results') or {}
+        published_date = results.get('published_date')
+        bestsellers_date = results.get('bestsellers_date')
+        if not published_date or not bestsellers_date:
+            raise ValueError("No published or bestsellers date in payload")
+        return name, published_date, bestsellers_date, transform_data(raw_data, run_date), None
+    except Exception as e:
+        return name, None, None, None, str(e)
+
+
+def transform_archive(source, failures, workers=ARCHIVE_WORKERS, batch_size=ARCHIVE_BATCH_SIZE, run_date=None):
+    """Parse and transform payloads under source across a process pool.
+
+    Yields batches of (published_date, bestsellers_date, transformed) as they
+    are ready, each sorted by published_date, with one entry per
+    bestsellers_date; unreadable payloads are appended to failures. Results
+    are taken in archive order with a few payloads per worker in flight, so
+    only about one batch is held in memory while the pool keeps working.
+    """
+    run_date = run_date or date.today()
+    max_in_flight = workers * 4
+    seen = set()
+    batch = []
+
+    def collect(future):
+        name, published_date, bestsellers_date, transformed, error = future.result()
+        if error:
+            logger.warning("Skipping %s: %s", name, error)
+            failures.append((name, error))
+        elif bestsellers_date not in seen:
+            seen.add(bestsellers_date)
+            batch.append((published_date, bestsellers_date, transformed))
+
+    def take_batch():
+        ready = sorted(batch, key=lambda payload: payload[0])
+        batch.clear()
+        return ready
+
+    # Spawned rather than forked so the logging thread is not shared
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(child_log_queue(context),)) as executor:
+        in_flight = deque()
+        for name, payload_source in iter_archive(source):
+            if len(in_flight) >= max_in_flight:
+                collect(in_flight.popleft())
+            if len(batch) >= batch_size:
+                yield take_batch()
+            in_flight.append(executor.submit(_transform_payload, name, payload_source, run_date))
+        while in_flight:
+            collect(in_flight.popleft())
+            if len(batch) >= batch_size:
+                yield take_batch()
+    if batch:
+        yield take_batch()
+    logger.info("Transformed %d payloads from %s (%d failed).", len(seen), source, len(failures))
+
+
+def completed_dates(conn, bestsellers_dates):
+    """bestsellers_dates already COMPLETED in load_status, in one query."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT DISTINCT bestsellers_date FROM load_status
+            WHERE bestsellers_date = ANY(%s::date[]) AND status = 'COMPLETED'
+        ''', (list(bestsellers_dates),))
+        completed = {row[0].isoformat() for row in cursor.fetchall()}
+        conn.commit()
+    finally:
+        cursor.close()
+    return completed
+
+
+def load_archive_batch(conn, batch, touched):
+    """Load transformed payloads in one transaction, each in its own savepoint.
+
+    Payloads are merged one at a time in published_date order, so every
+    week's dimension versions are kept, as the per-date loader keeps them.
+    Returns one result per payload.
+    """
+    return load_batch(conn, [
+        (datetime.strptime(published_date, '%Y-%m-%d').date(),
+         datetime.strptime(bestsellers_date, '%Y-%m-%d').date(),
+         transformed)
+        for published_date, bestsellers_date, transformed in batch
+    ], transform=None, touched=touched)
+
+
+def import_archive(conn, source, batch_size=ARCHIVE_BATCH_SIZE, workers=ARCHIVE_WORKERS):
+    """Rebuild the warehouse from archived overview responses.
+
+    Batches are loaded as the pool finishes them, in archive order and by
+    published_date within a batch; archives stored in date order (e.g. files
+    named by date) therefore load chronologically. Bestsellers dates already
+    COMPLETED are skipped. A payload's published_date stands in for its
+    requested_date in load_status. Returns (loaded, failed, skipped, touched
+    tables).
+    """
+    with log_context(stage='archive'):
+        failures = []
+        loaded = failed = skipped = 0
+        touched = set()
+        for batch in transform_archive(source, failures, workers, batch_size):
+            completed = completed_dates(conn, (payload[1] for payload in batch))
+            pending = [payload for payload in batch if payload[1] not in completed]
+            skipped += len(batch) - len(pending)
+            if not pending:
+                continue
+            results = load_archive_batch(conn, pending, touched)
+            loaded += sum(results)
+            failed += len(results) - sum(results)
+            logger.info("Loaded payloads %s to %s (%d failed).",
+                        pending[0][0], pending[-1][0], len(results) - sum(results))
+    return loaded, failed + len(failures), skipped, touched
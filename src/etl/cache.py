@@ -0,0 +1,185 @@
+# cache.py
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+# Raw responses live next to the logs under data/
+CACHE_DIR = os.getenv(
+    'RESPONSE_CACHE_DIR',
+    os.path.join(os.path.dirname(__file__), '../../data/cache/responses')
+)
+CACHE_TTL_SECONDS = int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '0'))  # 0 keeps entries forever
+CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))
+
+
+class CacheMiss(Exception):
+    """Raised in replay mode when a published_date is not cached."""
+
+
+class ResponseCache:
+    """Content-addressed, gzip-compressed cache of raw API responses.
+
+    Blobs are stored as `<sha256>.json.gz`, so identical payloads returned for
+    several requested dates are written once. `index.json` maps each
+    published_date to its blob with store and access times, which drive TTL
+    and least-recently-used size eviction.
+
+    Several processes may share the directory (backfill --processes, archive
+    workers), so every index write happens under a file lock and merges this
+    process's changes into the index as it is on disk.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl_seconds=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, 'index.json')
+        self.lock_path = os.path.join(directory, 'index.lock')
+        self.lock = threading.Lock()
+        # Entries this process stored or read, and digests of those it removed,
+        # since the index was last written
+        self.changed = {}
+        self.removed = {}
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._read_index()
+
+    def _read_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning("Response cache index at %s is corrupt; starting empty", self.index_path)
+            return {}
+
+    def _write_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    @contextmanager
+    def _index_lock(self):
+        """Hold the directory's file lock, excluding other processes."""
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sync_index(self, now):
+        """Merge pending changes into the index on disk, evict and write it back.
+
+        Call with both locks held. Blobs are deleted here, once the merged
+        index shows no other entry still references them.
+        """
+        index = self._read_index()
+        for published_date, digest in self.removed.items():
+            if index.get(published_date, {}).get('digest') == digest:
+                del index[published_date]
+        for published_date, entry in self.changed.items():
+            current = index.get(published_date)
+            if current and current['digest'] == entry['digest']:
+                current['accessed_at'] = max(current['accessed_at'], entry['accessed_at'])
+            elif current is None or current['stored_at'] <= entry['stored_at']:
+                index[published_date] = entry
+        self.index = index
+        self.changed.clear()
+        self._evict(now)
+
+        referenced = {entry['digest'] for entry in self.index.values()}
+        for digest in set(self.removed.values()) - referenced:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+        self.removed.clear()
+        self._write_index()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, f"{digest}.json.gz")
+
+    def _is_expired(self, entry, now):
+        return self.ttl_seconds > 0 and now - entry['stored_at'] > self.ttl_seconds
+
+    def get(self, published_date):
+        """Return the cached payload for a published_date, or None."""
+        with self.lock:
+            entry = self.index.get(published_date)
+            if not entry:
+                return None
+            now = time.time()
+            if self._is_expired(entry, now):
+                self._remove(published_date)
+                with self._index_lock():
+                    self._sync_index(now)
+                return None
+            try:
+                with gzip.open(self._blob_path(entry['digest']), 'rt', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Dropping unreadable cache entry for %s: %s", published_date, e)
+                self._remove(published_date)
+                with self._index_lock():
+                    self._sync_index(now)
+                return None
+            entry['accessed_at'] = now
+            self.changed[published_date] = entry
+            return data
+
+    def put(self, published_date, data):
+        """Store a payload under its content hash and index it by published_date."""
+        body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        with self.lock, self._index_lock():
+            blob_path = self._blob_path(digest)
+            if not os.path.exists(blob_path):
+                tmp_path = f"{blob_path}.{os.getpid()}.tmp"
+                with gzip.open(tmp_path, 'wb') as f:
+                    f.write(body)
+                os.replace(tmp_path, blob_path)
+            now = time.time()
+            self.changed[published_date] = {
+                'digest': digest,
+                'size': os.path.getsize(blob_path),
+                'stored_at': now,
+                'accessed_at': now
+            }
+            self._sync_index(now)
+
+    def _remove(self, published_date):
+        entry = self.index.pop(published_date, None)
+        self.changed.pop(published_date, None)
+        if entry:
+            self.removed[published_date] = entry['digest']
+
+    def _evict(self, now):
+        for published_date, entry in list(self.index.items()):
+            if self._is_expired(entry, now):
+                self._remove(published_date)
+
+        # Blobs are shared, so count each digest once when sizing the cache
+        sizes = {entry['digest']: entry['size'] for entry in self.index.values()}
+        total = sum(sizes.values())
+        for published_date, entry in sorted(self.index.items(), key=lambda item: item[1]['accessed_at']):
+            if total <= self.max_bytes:
+                break
+            still_shared = sum(1 for other in self.index.values() if other['digest'] == entry['digest']) > 1
+            self._remove(published_date)
+            if not still_shared:
+                total -= entry['size']
+
+    def flush(self):
+        """Persist access times gathered by reads."""
+        with self.lock, self._index_lock():
+            self._sync_index(time.time())
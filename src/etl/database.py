@@ -1,16 +1,152 @@
+import threading
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import pool
 import yaml
 import os
 from dotenv import load_dotenv
+from src.etl.instrumentation import SQL_INSTRUMENTATION, InstrumentedCursor
+from src.etl.utils.logger import get_logger
 
 load_dotenv()
 
-def get_db_connection():
-    conn = psycopg2.connect(
-        dbname=os.getenv('DB_NAME'),
-        user=os.getenv('DB_USER'),
-        password=os.getenv('DB_PASSWORD'),
-        host=os.getenv('DB_HOST'),
-        port=os.getenv('DB_PORT')
-    )
+logger = get_logger()
+
+# Pool sizing and session settings applied to every connection
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+DB_STATEMENT_TIMEOUT = os.getenv('DB_STATEMENT_TIMEOUT', '0')  # milliseconds, 0 disables
+DB_SYNCHRONOUS_COMMIT = os.getenv('DB_SYNCHRONOUS_COMMIT', 'on')
+DB_APPLICATION_NAME = os.getenv('DB_APPLICATION_NAME', 'nyt-etl')
+
+# How many times checkout replaces a dead pooled connection before giving up
+CHECKOUT_ATTEMPTS = 3
+
+def _connection_kwargs():
+    params = {
+        'dbname': os.getenv('DB_NAME'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'host': os.getenv('DB_HOST'),
+        'port': os.getenv('DB_PORT'),
+        'application_name': DB_APPLICATION_NAME,
+        'options': (
+            f"-c statement_timeout={DB_STATEMENT_TIMEOUT} "
+            f"-c synchronous_commit={DB_SYNCHRONOUS_COMMIT}"
+        )
+    }
+    # Time every statement by family (see instrumentation.py)
+    if SQL_INSTRUMENTATION:
+        params['cursor_factory'] = InstrumentedCursor
+    return params
+
+def get_db_connection(dbname=None, **kwargs):
+    """Open a standalone connection, optionally to another database on the same server."""
+    params = _connection_kwargs()
+    if dbname:
+        params['dbname'] = dbname
+    params.update(kwargs)
+    conn = psycopg2.connect(**params)
     return conn
+
+
+class ConnectionPool:
+    """Thread-safe pool whose checkout blocks until a connection is free.
+
+    psycopg2's ThreadedConnectionPool raises when exhausted, so a semaphore
+    sized to maxconn makes workers wait their turn instead.
+    """
+
+    def __init__(self, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX):
+        self.pool = pool.ThreadedConnectionPool(minconn, maxconn, **_connection_kwargs())
+        self.slots = threading.BoundedSemaphore(maxconn)
+
+    @staticmethod
+    def _is_healthy(conn):
+        if conn.closed:
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        self.slots.acquire()
+        try:
+            for _ in range(CHECKOUT_ATTEMPTS):
+                conn = self.pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                logger.warning("Discarding broken pooled connection")
+                self.pool.putconn(conn, close=True)
+            raise psycopg2.OperationalError("Could not check out a healthy database connection")
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn, close=False):
+        try:
+            self.pool.putconn(conn, close=close or bool(conn.closed))
+        finally:
+            self.slots.release()
+
+    def closeall(self):
+        self.pool.closeall()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def init_pool(minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX):
+    """Create the process-wide pool on first use and return it."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(minconn, maxconn)
+        return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+@contextmanager
+def pooled_connection():
+    """Check out a healthy connection, returning it to the pool afterwards.
+
+    Uncommitted work is rolled back on return; a connection that failed at the
+    network level is closed instead of being reused.
+    """
+    connection_pool = init_pool()
+    conn = connection_pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        if not broken and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        connection_pool.putconn(conn, close=broken)
+
+@contextmanager
+def transaction():
+    """Run a unit of work on a pooled connection, committing on success."""
+    with pooled_connection() as conn:
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
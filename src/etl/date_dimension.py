@@ -0,0 +1,85 @@
+# date_dimension.py
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+# One row per calendar day, computed set-based in Postgres. Existing rows keep
+# their publication fields; the derived columns match build_date_record.
+BUILD_CALENDAR_SQL = '''
+    INSERT INTO dim_date (
+        date_key, full_date, year, quarter, quarter_name, month, month_name,
+        week_of_year, week_start_date, week_end_date
+    )
+    SELECT
+        to_char(d, 'YYYYMMDD')::int,
+        d,
+        extract(year FROM d)::int,
+        extract(quarter FROM d)::int,
+        'Q' || extract(quarter FROM d)::int || ' ' || extract(year FROM d)::int,
+        extract(month FROM d)::int,
+        to_char(d, 'FMMonth'),
+        extract(week FROM d)::int,
+        date_trunc('week', d)::date,
+        (date_trunc('week', d) + interval '6 days')::date
+    FROM (
+        SELECT day::date AS d
+        FROM generate_series(%s::date, %s::date, interval '1 day') AS day
+    ) calendar
+    ON CONFLICT (date_key) DO NOTHING
+'''
+
+# Link each day to the weekly list in effect on it: the latest publication on
+# or before the day, until the next known one (or a week later at most).
+BACKFILL_PUBLICATION_LINKS_SQL = '''
+    WITH publications AS (
+        SELECT
+            full_date, bestsellers_date, previous_published_date, next_published_date,
+            LEAD(full_date) OVER (ORDER BY full_date) AS following_date
+        FROM dim_date
+        WHERE full_date = published_date
+    )
+    UPDATE dim_date d SET
+        published_date = p.full_date,
+        bestsellers_date = p.bestsellers_date,
+        previous_published_date = p.previous_published_date,
+        next_published_date = p.next_published_date
+    FROM publications p
+    WHERE d.full_date > p.full_date
+      AND d.full_date < LEAST(p.following_date, p.next_published_date, p.full_date + 7)
+      AND d.full_date BETWEEN %s AND %s
+      AND (d.published_date, d.bestsellers_date, d.previous_published_date, d.next_published_date)
+          IS DISTINCT FROM
+          (p.full_date, p.bestsellers_date, p.previous_published_date, p.next_published_date)
+'''
+
+
+def build_calendar(conn, start_date, end_date):
+    """Insert every missing dim_date row between start_date and end_date in one statement."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(BUILD_CALENDAR_SQL, (start_date, end_date))
+        inserted = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    logger.info("Calendar %s to %s: %d dim_date rows added.", start_date, end_date, inserted)
+    return inserted
+
+
+def backfill_publication_links(conn, start_date, end_date):
+    """Fill the publication fields of calendar days between loaded publications."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(BACKFILL_PUBLICATION_LINKS_SQL, (start_date, end_date))
+        updated = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    logger.info("Linked %d dim_date rows to their publication.", updated)
+    return updated
@@ -0,0 +1,277 @@
+# export.py
+import json
+import os
+import shutil
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+from psycopg2.extensions import ISOLATION_LEVEL_REPEATABLE_READ
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+EXPORT_DIR = os.getenv('EXPORT_DIR') or os.path.join(os.path.dirname(__file__), '../../data/exports')
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', '50000'))
+EXPORT_COMPRESSION = os.getenv('EXPORT_COMPRESSION', 'zstd')
+
+WATERMARK_FILE = '_watermarks.json'
+
+# Facts are exported incrementally on date_key into year=/quarter= partitions.
+# Rows must come back ordered by date_key so one partition is written at a time;
+# the leading year and quarter columns only pick the partition and are not
+# written, since readers take them from the directory names.
+FACT_EXPORTS = {
+    'fact_book_rankings': {
+        'query': '''
+            SELECT d.year, d.quarter, f.date_key, f.ranking_key, f.book_key, f.list_key,
+                   f.rank, f.price
+            FROM fact_book_rankings f
+            JOIN dim_date d ON f.date_key = d.date_key
+            WHERE f.date_key > %s
+            ORDER BY f.date_key
+        ''',
+        'schema': pa.schema([
+            ('date_key', pa.int32()),
+            ('ranking_key', pa.int32()), ('book_key', pa.int32()), ('list_key', pa.int32()),
+            ('rank', pa.int32()), ('price', pa.decimal128(10, 2))
+        ])
+    },
+    'fact_publisher_performance': {
+        'query': '''
+            SELECT year, quarter, date_key, performance_key, publisher_key, list_key,
+                   total_points, books_in_top_5,
+                   rank_1_count, rank_2_count, rank_3_count, rank_4_count, rank_5_count
+            FROM fact_publisher_performance
+            WHERE date_key > %s
+            ORDER BY date_key
+        ''',
+        'schema': pa.schema([
+            ('date_key', pa.int32()),
+            ('performance_key', pa.int32()), ('publisher_key', pa.int32()), ('list_key', pa.int32()),
+            ('total_points', pa.int32()), ('books_in_top_5', pa.int32()),
+            ('rank_1_count', pa.int32()), ('rank_2_count', pa.int32()), ('rank_3_count', pa.int32()),
+            ('rank_4_count', pa.int32()), ('rank_5_count', pa.int32())
+        ])
+    }
+}
+
+# Dimensions are small next to the facts; their current rows are re-exported
+# as one snapshot file each run.
+DIMENSION_EXPORTS = {
+    'dim_date': {
+        'query': '''
+            SELECT date_key, full_date, year, quarter, quarter_name, month, month_name,
+                   week_of_year, week_start_date, week_end_date, bestsellers_date,
+                   published_date, previous_published_date, next_published_date
+            FROM dim_date
+            ORDER BY date_key
+        ''',
+        'schema': pa.schema([
+            ('date_key', pa.int32()), ('full_date', pa.date32()), ('year', pa.int32()),
+            ('quarter', pa.int32()), ('quarter_name', pa.string()), ('month', pa.int32()),
+            ('month_name', pa.string()), ('week_of_year', pa.int32()),
+            ('week_start_date', pa.date32()), ('week_end_date', pa.date32()),
+            ('bestsellers_date', pa.date32()), ('published_date', pa.date32()),
+            ('previous_published_date', pa.date32()), ('next_published_date', pa.date32())
+        ])
+    },
+    'dim_publisher': {
+        'query': '''
+            SELECT publisher_key, publisher_name, effective_start_date
+            FROM dim_publisher
+            WHERE is_current = TRUE
+            ORDER BY publisher_key
+        ''',
+        'schema': pa.schema([
+            ('publisher_key', pa.int32()), ('publisher_name', pa.string()),
+            ('effective_start_date', pa.date32())
+        ])
+    },
+    'dim_list': {
+        'query': '''
+            SELECT list_key, list_id, list_name, display_name, update_frequency,
+                   list_image_url, effective_start_date
+            FROM dim_list
+            WHERE is_current = TRUE
+            ORDER BY list_key
+        ''',
+        'schema': pa.schema([
+            ('list_key', pa.int32()), ('list_id', pa.int32()), ('list_name', pa.string()),
+            ('display_name', pa.string()), ('update_frequency', pa.string()),
+            ('list_image_url', pa.string()), ('effective_start_date', pa.date32())
+        ])
+    },
+    'dim_book': {
+        'query': '''
+            SELECT book_key, title, author, contributor, contributor_note, age_group,
+                   publisher_key, primary_isbn13, primary_isbn10, description,
+                   created_date, updated_date, effective_start_date
+            FROM dim_book
+            WHERE is_current = TRUE
+            ORDER BY book_key
+        ''',
+        'schema': pa.schema([
+            ('book_key', pa.int32()), ('title', pa.string()), ('author', pa.string()),
+            ('contributor', pa.string()), ('contributor_note', pa.string()),
+            ('age_group', pa.string()), ('publisher_key', pa.int32()),
+            ('primary_isbn13', pa.string()), ('primary_isbn10', pa.string()),
+            ('description', pa.string()), ('created_date', pa.timestamp('us')),
+            ('updated_date', pa.timestamp('us')), ('effective_start_date', pa.date32())
+        ])
+    }
+}
+
+
+def load_watermarks(export_dir=EXPORT_DIR):
+    """Last exported date_key per fact table."""
+    path = os.path.join(export_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(watermarks, export_dir=EXPORT_DIR):
+    """Persist watermarks atomically so a crash never skips rows."""
+    path = os.path.join(export_dir, WATERMARK_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _to_table(rows, schema):
+    columns = list(zip(*rows))
+    return pa.Table.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def _stream_chunks(conn, name, query, params=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield lists of rows from a named (server-side) cursor."""
+    cursor = conn.cursor(name=f"export_{name}")
+    cursor.itersize = chunk_rows
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+
+class _PartitionWriter:
+    """Write a date_key-ordered stream to one Parquet file per year/quarter.
+
+    Only the current partition's writer is open, so memory stays bounded by
+    one chunk regardless of how much history is exported.
+    """
+
+    def __init__(self, table_dir, schema, first_key):
+        self.table_dir = table_dir
+        self.schema = schema
+        self.first_key = first_key
+        self.partition = None
+        self.writer = None
+        self.tmp_path = None
+        self.path = None
+        self.files = []
+
+    def write(self, partition, rows):
+        if partition != self.partition:
+            self.close()
+            year, quarter = partition
+            partition_dir = os.path.join(self.table_dir, f"year={year}", f"quarter={quarter}")
+            os.makedirs(partition_dir, exist_ok=True)
+            # Files are named after the export's starting watermark, so an
+            # incremental run adds new files instead of rewriting old ones
+            self.path = os.path.join(partition_dir, f"part-{self.first_key}.parquet")
+            self.tmp_path = f"{self.path}.tmp"
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression=EXPORT_COMPRESSION)
+            self.partition = partition
+        self.writer.write_table(_to_table(rows, self.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp_path, self.path)
+            self.files.append(self.path)
+            self.writer = None
+            self.partition = None
+
+
+def export_fact(conn, table, since_key=0, export_dir=EXPORT_DIR, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Export fact rows with date_key > since_key; returns (rows, last date_key)."""
+    spec = FACT_EXPORTS[table]
+    writer = _PartitionWriter(os.path.join(export_dir, table), spec['schema'], since_key + 1)
+    exported = 0
+    last_key = since_key
+    try:
+        for rows in _stream_chunks(conn, table, spec['query'], (since_key,), chunk_rows):
+            # Split the chunk at year/quarter boundaries; rows arrive in date_key order
+            start = 0
+            for i in range(1, len(rows) + 1):
+                if i == len(rows) or rows[i][:2] != rows[start][:2]:
+                    writer.write(tuple(rows[start][:2]), [row[2:] for row in rows[start:i]])
+                    start = i
+            exported += len(rows)
+            last_key = rows[-1][2]
+    finally:
+        writer.close()
+    logger.info("Exported %d %s rows into %d files.", exported, table, len(writer.files))
+    return exported, last_key
+
+
+def export_dimension(conn, table, export_dir=EXPORT_DIR, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Export the current rows of a dimension as a single snapshot file."""
+    spec = DIMENSION_EXPORTS[table]
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"{table}.parquet")
+    tmp_path = f"{path}.tmp"
+    exported = 0
+    writer = pq.ParquetWriter(tmp_path, spec['schema'], compression=EXPORT_COMPRESSION)
+    try:
+        for rows in _stream_chunks(conn, table, spec['query'], chunk_rows=chunk_rows):
+            writer.write_table(_to_table(rows, spec['schema']))
+            exported += len(rows)
+    finally:
+        writer.close()
+    os.replace(tmp_path, path)
+    logger.info("Exported %d %s rows.", exported, table)
+    return exported
+
+
+def export_star_schema(conn, export_dir=EXPORT_DIR, full=False, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Export dimensions and new fact rows from one consistent snapshot.
+
+    Fact tables resume from the date_key watermark of the previous export
+    unless full=True. Returns rows exported per table.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    watermarks = {} if full else load_watermarks(export_dir)
+    counts = {}
+    if full:
+        for table in FACT_EXPORTS:
+            shutil.rmtree(os.path.join(export_dir, table), ignore_errors=True)
+
+    # One REPEATABLE READ transaction so facts and dimensions agree
+    conn.set_session(isolation_level=ISOLATION_LEVEL_REPEATABLE_READ, readonly=True)
+    try:
+        for table in DIMENSION_EXPORTS:
+            counts[table] = export_dimension(conn, table, export_dir, chunk_rows)
+        for table in FACT_EXPORTS:
+            since_key = watermarks.get(table, {}).get('date_key', 0)
+            counts[table], last_key = export_fact(conn, table, since_key, export_dir, chunk_rows)
+            watermarks[table] = {'date_key': last_key, 'exported_at': datetime.now().isoformat()}
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.set_session(isolation_level='DEFAULT', readonly='DEFAULT')
+
+    save_watermarks(watermarks, export_dir)
+    return counts
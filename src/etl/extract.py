@@ -1,6 +1,7 @@
-import requests
-import time
-from datetime import datetime, timedelta
+import threading
+from src.etl.cache import CacheMiss, ResponseCache
+from src.etl.http_client import CircuitBreaker, ExtractionError, NYTClient
+from src.etl.metrics import RESPONSE_CACHE
 from src.etl.utils.logger import get_logger
 import os
 from dotenv import load_dotenv
@@ -14,34 +15,75 @@ logger = get_logger()
 API_KEY = os.getenv('API_KEY')
 BASE_URL = os.getenv('BASE_URL')
 
-# Ensure API_KEY and BASE_URL are set
-if not API_KEY or not BASE_URL:
-    logger.error("API_KEY or BASE_URL is missing in the .env file.")
-    raise ValueError("API_KEY or BASE_URL is not set in the .env file.")
+# HTTP client settings
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '5'))
+HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '2'))
+HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '120'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '60'))
+
+# Raw responses are cached on disk so re-runs and replays skip the API
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Return the process-wide NYT client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            # Ensure API_KEY and BASE_URL are set
+            if not API_KEY or not BASE_URL:
+                logger.error("API_KEY or BASE_URL is missing in the .env file.")
+                raise ValueError("API_KEY or BASE_URL is not set in the .env file.")
+            _client = NYTClient(
+                BASE_URL, API_KEY,
+                pool_size=HTTP_POOL_SIZE,
+                connect_timeout=HTTP_CONNECT_TIMEOUT,
+                read_timeout=HTTP_READ_TIMEOUT,
+                max_retries=HTTP_MAX_RETRIES,
+                backoff_base=HTTP_BACKOFF_BASE,
+                backoff_max=HTTP_BACKOFF_MAX,
+                circuit_breaker=CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+            )
+        return _client
+
+def client_stats():
+    """Return the HTTP client's counters, or None if no API call was made."""
+    return _client.stats() if _client else None
+
+def flush_response_cache():
+    """Persist cache access times so LRU eviction in later runs sees this run's reads."""
+    if response_cache:
+        response_cache.flush()
+
+def extract_data(published_date, rate_limiter=None, replay=False):
+    if response_cache:
+        cached = response_cache.get(published_date)
+        if cached is not None:
+            RESPONSE_CACHE.labels('hit').inc()
+            logger.info("Using cached response for %s", published_date)
+            return cached
+        RESPONSE_CACHE.labels('miss').inc()
+    if replay:
+        raise CacheMiss(f"No cached response for {published_date}")
 
-def extract_data(published_date):
-    params = {
-        'published_date': published_date,
-        'api-key': API_KEY
-    }
     try:
-        logger.info(f"Extracting data for {published_date}...")
-        response = requests.get(BASE_URL, params=params)
-        
-        if response.status_code == 200:
-            data = response.json()
-            # Validate expected fields
-            if 'results' not in data:
-                raise ValueError("Missing 'results' in API response")
-            logger.info(f"Data extraction successful for {published_date}")
-            return data
-        elif response.status_code == 429:
-            logger.warning(f"Rate limit hit for {published_date}. Retrying after 15 seconds...")
-            time.sleep(15)
-            return extract_data(published_date)
-        else:
-            logger.error(f"Error fetching data: {response.status_code} - {response.text}")
-            raise Exception(f"API error: {response.status_code}")
+        logger.info("Extracting data for %s...", published_date)
+        data = get_client().get_overview(published_date, rate_limiter=rate_limiter)
+
+        # Validate expected fields
+        if not data.get('results'):
+            raise ExtractionError("Missing 'results' in API response")
+        if response_cache:
+            response_cache.put(published_date, data)
+        logger.info("Data extraction successful for %s", published_date)
+        return data
     except Exception as e:
-        logger.error(f"Failed to extract data: {e}")
-        raise
\ No newline at end of file
+        logger.error("Failed to extract data: %s", e)
+        raise
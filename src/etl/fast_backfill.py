@@ -0,0 +1,157 @@
+# fast_backfill.py
+import os
+from src.etl.load import WAREHOUSE_TABLES
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+# Session settings for rebuilding indexes after a fast backfill; Postgres
+# splits each index build across up to this many parallel workers.
+FAST_BACKFILL_MAINTENANCE_WORKERS = int(os.getenv('FAST_BACKFILL_MAINTENANCE_WORKERS', '4'))
+FAST_BACKFILL_MAINTENANCE_MEM = os.getenv('FAST_BACKFILL_MAINTENANCE_MEM', '1GB')
+
+# Secondary indexes the loader itself reads while merging (current-row
+# lookups and load_status checks); dropping them would slow the backfill down.
+# Unique constraints are never deferred: the SCD merges' ON CONFLICT needs them.
+KEEP_INDEXES = [
+    'ix_dim_book_isbn13_current',
+    'ix_dim_list_list_id_current',
+    'ix_dim_publisher_name_current',
+    'ix_load_status_bestsellers_date',
+    'ix_load_status_requested_date',
+]
+
+# Foreign keys declared on the warehouse tables themselves; on partitioned
+# tables the partitions' copies go with them
+FOREIGN_KEYS_SQL = '''
+    SELECT c.conname, t.relname, pg_get_constraintdef(c.oid)
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    WHERE c.contype = 'f' AND c.conparentid = 0
+      AND t.relnamespace = current_schema()::regnamespace
+      AND t.relname = ANY(%s)
+'''
+
+# Plain secondary indexes, i.e. not backing a primary key or unique constraint
+SECONDARY_INDEXES_SQL = '''
+    SELECT i.relname, t.relname, pg_get_indexdef(i.oid)
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class t ON t.oid = x.indrelid
+    WHERE NOT x.indisunique AND NOT x.indisprimary
+      AND t.relnamespace = current_schema()::regnamespace
+      AND t.relname = ANY(%s)
+      AND i.relname <> ALL(%s)
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+'''
+
+
+def defer_secondary_objects(conn, tables=WAREHOUSE_TABLES):
+    """Drop secondary indexes and foreign keys on the warehouse tables.
+
+    Their definitions are saved in deferred_schema_objects in the same
+    transaction, so restore_deferred can rebuild them even after a crash.
+    Objects already deferred by an earlier, unfinished run stay deferred.
+    Returns the number of objects dropped.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(FOREIGN_KEYS_SQL, (list(tables),))
+        foreign_keys = cursor.fetchall()
+        cursor.execute(SECONDARY_INDEXES_SQL, (list(tables), KEEP_INDEXES))
+        indexes = cursor.fetchall()
+
+        for kind, objects in (('foreign_key', foreign_keys), ('index', indexes)):
+            for name, table, definition in objects:
+                cursor.execute('''
+                    INSERT INTO deferred_schema_objects (object_name, table_name, kind, definition)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (object_name) DO NOTHING
+                ''', (name, table, kind, definition))
+                if kind == 'foreign_key':
+                    cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+                else:
+                    cursor.execute(f"DROP INDEX {name}")
+        conn.commit()
+    except Exception as e:
+        logger.error("Deferring indexes and foreign keys failed: %s", e)
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    logger.info("Deferred %d foreign keys and %d indexes for the backfill.", len(foreign_keys), len(indexes))
+    return len(foreign_keys) + len(indexes)
+
+
+def _restore_index(cursor, name, definition):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    if cursor.fetchone()[0]:
+        return
+    cursor.execute("SET LOCAL max_parallel_maintenance_workers = %s", (FAST_BACKFILL_MAINTENANCE_WORKERS,))
+    cursor.execute("SET LOCAL maintenance_work_mem = %s", (FAST_BACKFILL_MAINTENANCE_MEM,))
+    cursor.execute(definition)
+
+
+def _restore_foreign_key(conn, cursor, name, table, definition):
+    """Re-add a foreign key, validating it in a separate, lighter step when possible.
+
+    NOT VALID skips the check while the constraint is added; VALIDATE then
+    scans the table holding only a SHARE UPDATE EXCLUSIVE lock. Partitioned
+    tables do not accept NOT VALID foreign keys, so those are checked on add.
+    """
+    cursor.execute('''
+        SELECT c.convalidated, t.relkind
+        FROM pg_class t
+        LEFT JOIN pg_constraint c ON c.conrelid = t.oid AND c.conname = %s
+        WHERE t.oid = %s::regclass
+    ''', (name, table))
+    validated, relkind = cursor.fetchone()
+    if validated is None:
+        not_valid = '' if relkind == 'p' else ' NOT VALID'
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}{not_valid}")
+        conn.commit()
+        validated = relkind == 'p'
+    if not validated:
+        cursor.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def restore_deferred(conn):
+    """Rebuild every deferred index, then re-add and validate every foreign key.
+
+    Each object is restored and removed from deferred_schema_objects in its
+    own transaction, so a failure (e.g. a foreign key violated by loaded
+    rows) leaves the remaining objects recorded for a later attempt.
+    Does nothing before migration 0006. Returns the number of objects restored.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT to_regclass('deferred_schema_objects') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            conn.commit()
+            return 0
+        cursor.execute('''
+            SELECT object_name, table_name, kind, definition
+            FROM deferred_schema_objects
+            ORDER BY kind DESC, object_name
+        ''')
+        deferred = cursor.fetchall()
+        conn.commit()
+
+        for name, table, kind, definition in deferred:
+            logger.info("Restoring %s %s on %s...", kind.replace('_', ' '), name, table)
+            try:
+                if kind == 'index':
+                    _restore_index(cursor, name, definition)
+                else:
+                    _restore_foreign_key(conn, cursor, name, table, definition)
+                cursor.execute("DELETE FROM deferred_schema_objects WHERE object_name = %s", (name,))
+                conn.commit()
+            except Exception as e:
+                logger.error("Restoring %s failed: %s", name, e)
+                conn.rollback()
+                raise
+    finally:
+        cursor.close()
+    if deferred:
+        logger.info("Restored %d deferred indexes and foreign keys.", len(deferred))
+    return len(deferred)
@@ -0,0 +1,253 @@
+# http_client.py
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from src.etl.metrics import API_REQUEST_SECONDS, API_REQUESTS, API_RETRIES
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Client counters that are also request outcomes in Prometheus
+OUTCOME_COUNTERS = {'succeeded', 'rate_limited', 'server_errors', 'connection_errors', 'client_errors'}
+
+
+class ExtractionError(Exception):
+    """Raised when the API cannot return a usable payload."""
+
+
+class CircuitOpenError(ExtractionError):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Stop calling the API after repeated failures, then probe after a cool-down.
+
+    Closed: calls flow. Open: calls fail fast until `reset_seconds` pass.
+    Half-open: one probe call is let through; success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_seconds or self.probing:
+                raise CircuitOpenError("Circuit breaker is open; skipping API call")
+            self.probing = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_throttled(self):
+        """A throttled probe proves nothing either way; allow another probe."""
+        with self.lock:
+            self.probing = False
+
+    def record_client_error(self):
+        """A 4xx says nothing about the service's health, so it is not counted.
+
+        A half-open probe that gets one has still not shown the service
+        recovered, so the circuit opens again for another cool-down.
+        """
+        with self.lock:
+            if self.probing:
+                self.probing = False
+                self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Circuit breaker opened after %d consecutive failures", self.failures)
+                self.opened_at = time.monotonic()
+
+
+class NYTClient:
+    """Reusable NYT Books API client.
+
+    One keep-alive session with a sized connection pool, gzip negotiation,
+    connect/read timeouts and a single retry policy: retryable responses and
+    connection errors are retried with full-jitter exponential backoff, and a
+    Retry-After header, when present, sets the delay instead.
+    """
+
+    def __init__(self, base_url, api_key, pool_size=10, connect_timeout=5.0, read_timeout=30.0,
+                 max_retries=5, backoff_base=1.0, backoff_max=60.0, circuit_breaker=None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        })
+
+        self.stats_lock = threading.Lock()
+        self.counters = {
+            'calls': 0,
+            'retries': 0,
+            'succeeded': 0,
+            'rate_limited': 0,
+            'server_errors': 0,
+            'connection_errors': 0,
+            'client_errors': 0,
+            'failures': 0,
+            'latency_seconds_total': 0.0,
+            'latency_seconds_max': 0.0
+        }
+
+    def _count(self, name, amount=1):
+        with self.stats_lock:
+            self.counters[name] += amount
+        if name == 'retries':
+            API_RETRIES.inc(amount)
+        elif name in OUTCOME_COUNTERS:
+            API_REQUESTS.labels(name).inc(amount)
+
+    def _record_latency(self, seconds):
+        API_REQUEST_SECONDS.observe(seconds)
+        with self.stats_lock:
+            self.counters['calls'] += 1
+            self.counters['latency_seconds_total'] += seconds
+            self.counters['latency_seconds_max'] = max(self.counters['latency_seconds_max'], seconds)
+
+    def stats(self):
+        """Return a snapshot of the call, retry and latency counters."""
+        with self.stats_lock:
+            snapshot = dict(self.counters)
+        calls = snapshot['calls']
+        snapshot['latency_seconds_avg'] = snapshot['latency_seconds_total'] / calls if calls else 0.0
+        return snapshot
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(response):
+        """Parse a Retry-After header given in seconds or as an HTTP date."""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def get_overview(self, published_date, rate_limiter=None):
+        """Fetch the lists overview for a published_date."""
+        params = {
+            'published_date': published_date,
+            'api-key': self.api_key
+        }
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+            self.circuit_breaker.before_call()
+            if rate_limiter:
+                rate_limiter.acquire()
+
+            started = time.perf_counter()
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record_latency(time.perf_counter() - started)
+                self._count('connection_errors')
+                self.circuit_breaker.record_failure()
+                last_error = e
+                if attempt == self.max_retries:
+                    break
+                delay = self._backoff(attempt)
+                logger.warning("Connection error for %s: %s. Retrying in %.1fs...", published_date, e, delay)
+                time.sleep(delay)
+                continue
+            elapsed = time.perf_counter() - started
+            self._record_latency(elapsed)
+            logger.debug("GET overview %s -> %d in %.3fs (attempt %d)",
+                         published_date, response.status_code, elapsed, attempt + 1)
+
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                except ValueError as e:
+                    # Truncated or garbled body; treat like a transient server error
+                    self._count('server_errors')
+                    self.circuit_breaker.record_failure()
+                    last_error = e
+                    if attempt == self.max_retries:
+                        break
+                    delay = self._backoff(attempt)
+                    logger.warning("Invalid JSON for %s: %s. Retrying in %.1fs...", published_date, e, delay)
+                    time.sleep(delay)
+                    continue
+                self._count('succeeded')
+                self.circuit_breaker.record_success()
+                return data
+
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                if response.status_code == 429:
+                    # Throttling is not a service failure, so it does not trip the breaker
+                    self._count('rate_limited')
+                    self.circuit_breaker.record_throttled()
+                else:
+                    self._count('server_errors')
+                    self.circuit_breaker.record_failure()
+                last_error = ExtractionError(f"API error: {response.status_code}")
+                # No point waiting when no attempt follows
+                if attempt == self.max_retries:
+                    break
+                retry_after = self._retry_after(response)
+                delay = min(retry_after, self.backoff_max) if retry_after is not None else self._backoff(attempt)
+                logger.warning(
+                    "HTTP %d for %s. Retrying in %.1fs...", response.status_code, published_date, delay
+                )
+                time.sleep(delay)
+                continue
+
+            # Ends a half-open probe, which would otherwise block every later call
+            self.circuit_breaker.record_client_error()
+            self._count('client_errors')
+            self._count('failures')
+            logger.error("Error fetching data: %d - %s", response.status_code, response.text)
+            raise ExtractionError(f"API error: {response.status_code}")
+
+        self._count('failures')
+        raise ExtractionError(f"Giving up on {published_date} after {self.max_retries} retries: {last_error}")
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,238 @@
+# instrumentation.py
+import json
+import os
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from psycopg2.extensions import cursor as base_cursor
+from src.etl.utils.logger import LOG_DIR, RUN_ID, get_logger
+
+logger = get_logger()
+
+# Time every statement by family; statements slower than SQL_SLOW_MS are
+# logged, and with SQL_EXPLAIN_SLOW their plan is captured as well.
+SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', 'true').lower() == 'true'
+SQL_SLOW_MS = float(os.getenv('SQL_SLOW_MS', '1000'))
+SQL_EXPLAIN_SLOW = os.getenv('SQL_EXPLAIN_SLOW', 'false').lower() == 'true'
+SQL_SUMMARY_DIR = os.getenv('SQL_SUMMARY_DIR') or os.path.join(LOG_DIR, 'sql')
+
+# Longest statement text kept in slow logs
+SLOW_SQL_CHARS = 2000
+
+# Latencies kept per family for percentiles; beyond this a uniform sample is
+# kept, while calls, total and max stay exact
+LATENCY_SAMPLE_SIZE = 10000
+
+# Verb and target table; the first data-modifying clause wins, so the SCD
+# merges (WITH ... UPDATE ... INSERT) are filed under their INSERT target
+FAMILY_PATTERNS = [
+    re.compile(r'\bINSERT\s+INTO\s+(\w+)', re.IGNORECASE),
+    re.compile(r'\bDELETE\s+FROM\s+(\w+)', re.IGNORECASE),
+    re.compile(r'\bUPDATE\s+(\w+)\s+(?:\w+\s+)?SET\b', re.IGNORECASE),
+    re.compile(r'\bCOPY\s+(\w+)', re.IGNORECASE),
+    re.compile(r'\bREFRESH\s+MATERIALIZED\s+VIEW\s+(?:CONCURRENTLY\s+)?(\w+)', re.IGNORECASE),
+    re.compile(r'\bSELECT\b.*?\bFROM\s+(\w+)', re.IGNORECASE | re.DOTALL),
+]
+FAMILY_VERBS = ['insert', 'delete', 'update', 'copy', 'refresh', 'select']
+
+# Only the loader's DML is re-run under EXPLAIN ANALYZE. SELECTs are not,
+# nor anything calling pg_* functions: a slow SELECT pg_advisory_lock() run
+# again would take a second session lock that ROLLBACK TO SAVEPOINT keeps.
+EXPLAINABLE = re.compile(r'^\s*(WITH|INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+EXPLAIN_FAMILIES = ('insert ', 'update ', 'delete ')
+SYSTEM_FUNCTION = re.compile(r'\bpg_\w+\s*\(', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_family(sql):
+    """Classify a statement as '<verb> <table>', e.g. 'insert dim_book'."""
+    for verb, pattern in zip(FAMILY_VERBS, FAMILY_PATTERNS):
+        match = pattern.search(sql)
+        if match:
+            return f"{verb} {match.group(1).lower()}"
+    return sql.split(None, 1)[0].lower() if sql.strip() else 'empty'
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class StatementStats:
+    """Call count, latencies and rows affected for one statement family.
+
+    Latencies are reservoir-sampled so long runs stay bounded in memory.
+    """
+
+    def __init__(self, sample_size=LATENCY_SAMPLE_SIZE):
+        self.calls = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.sample_size = sample_size
+        self.latencies = []
+        self.rng = random.Random(0)
+
+    def record(self, seconds, rows):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if len(self.latencies) < self.sample_size:
+            self.latencies.append(seconds)
+        else:
+            slot = self.rng.randrange(self.calls)
+            if slot < self.sample_size:
+                self.latencies[slot] = seconds
+        if rows and rows > 0:
+            self.rows += rows
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        return {
+            'calls': self.calls,
+            'rows': self.rows,
+            'total_ms': round(self.total_seconds * 1000, 3),
+            'p50_ms': round(_percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(_percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(_percentile(latencies, 0.99) * 1000, 3),
+            'max_ms': round(self.max_seconds * 1000, 3),
+        }
+
+
+class StatementRegistry:
+    """Per-process statement statistics shared by every instrumented cursor."""
+
+    def __init__(self):
+        self.families = {}
+        self.slow = []
+        self.lock = threading.Lock()
+
+    def record(self, family, seconds, rows):
+        with self.lock:
+            stats = self.families.get(family)
+            if stats is None:
+                stats = self.families[family] = StatementStats()
+            stats.record(seconds, rows)
+
+    def record_slow(self, family, seconds, sql, plan=None):
+        with self.lock:
+            self.slow.append({
+                'family': family,
+                'ms': round(seconds * 1000, 3),
+                'sql': sql[:SLOW_SQL_CHARS],
+                'plan': plan
+            })
+
+    def summary(self):
+        """Families ordered by total time, the hottest first."""
+        with self.lock:
+            families = {family: stats.summary() for family, stats in self.families.items()}
+        return dict(sorted(families.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+    def reset(self):
+        with self.lock:
+            self.families.clear()
+            self.slow.clear()
+
+
+sql_stats = StatementRegistry()
+
+
+def _explainable(family, text):
+    return (family.startswith(EXPLAIN_FAMILIES) and EXPLAINABLE.match(text) is not None
+            and SYSTEM_FUNCTION.search(text) is None)
+
+
+def _text(sql):
+    return sql.decode('utf-8', 'replace') if isinstance(sql, bytes) else str(sql)
+
+
+class InstrumentedCursor(base_cursor):
+    """Cursor that times every statement into sql_stats.
+
+    Install it with cursor_factory (see database.py) so the loader, the
+    load_status helpers and everything else are covered without changes.
+    """
+
+    def _timed(self, sql, run, bound=True):
+        started = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - started
+        # Families come from the template, so parameter values never split them
+        family = statement_family(_text(sql))
+        sql_stats.record(family, elapsed, self.rowcount)
+        if elapsed * 1000 >= SQL_SLOW_MS:
+            # The statement as sent, with its parameters bound (for
+            # executemany, the last one); COPY takes none and leaves query unset
+            sent = self.query if bound and self.query is not None else sql
+            self._log_slow(family, elapsed, _text(sent))
+        return result
+
+    def _log_slow(self, family, elapsed, text):
+        plan = None
+        if SQL_EXPLAIN_SLOW and self.name is None and _explainable(family, text):
+            plan = self._explain(text)
+        logger.warning("Slow statement (%s, %.0f ms): %s", family, elapsed * 1000, text[:SLOW_SQL_CHARS])
+        if plan:
+            logger.warning("Plan for slow %s:\n%s", family, plan)
+        sql_stats.record_slow(family, elapsed, text, plan)
+
+    def _explain(self, text):
+        """EXPLAIN (ANALYZE, BUFFERS) a statement that just ran, then undo it.
+
+        The statement runs a second time inside a savepoint that is rolled
+        back, on a plain cursor so this cursor's result set is untouched. The
+        plan therefore reflects the state after the first run.
+        """
+        conn = self.connection
+        if conn.autocommit:
+            return None
+        cursor = conn.cursor(cursor_factory=base_cursor)
+        try:
+            cursor.execute("SAVEPOINT sql_explain")
+            try:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {text}")
+                return '\n'.join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT sql_explain")
+                cursor.execute("RELEASE SAVEPOINT sql_explain")
+        except Exception as e:
+            logger.warning("EXPLAIN capture failed: %s", e)
+            return None
+        finally:
+            cursor.close()
+
+    def execute(self, query, vars=None):
+        return self._timed(query, lambda: super(InstrumentedCursor, self).execute(query, vars))
+
+    def executemany(self, query, vars_list):
+        return self._timed(query, lambda: super(InstrumentedCursor, self).executemany(query, vars_list))
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(sql, lambda: super(InstrumentedCursor, self).copy_expert(sql, file, size),
+                           bound=False)
+
+
+def log_sql_summary(path=None):
+    """Log this run's statement families and write them, with slow statements, as JSON."""
+    summary = sql_stats.summary()
+    if not summary:
+        return None
+    lines = [
+        f"{family:<45} calls={stats['calls']:<7} rows={stats['rows']:<9} "
+        f"total={stats['total_ms']:.0f}ms p50={stats['p50_ms']:.1f}ms "
+        f"p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms"
+        for family, stats in summary.items()
+    ]
+    logger.info("SQL summary by statement family:\n%s", '\n'.join(lines))
+
+    path = path or os.path.join(SQL_SUMMARY_DIR, f"sql_summary_{RUN_ID}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with sql_stats.lock:
+        slow = list(sql_stats.slow)
+    with open(path, 'w') as f:
+        json.dump({'run_id': RUN_ID, 'families': summary, 'slow_statements': slow}, f, indent=2)
+    logger.info("Wrote SQL summary to %s", path)
+    return path
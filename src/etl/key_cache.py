@@ -0,0 +1,175 @@
+# key_cache.py
+import os
+import threading
+from collections import OrderedDict
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+KEY_CACHE_SIZE = int(os.getenv('KEY_CACHE_SIZE', '100000'))
+
+# natural key -> surrogate key lookups for current dimension rows
+DIMENSION_LOOKUPS = {
+    'publisher': '''
+        SELECT publisher_name, publisher_key FROM dim_publisher
+        WHERE is_current = TRUE {filter}
+        ORDER BY publisher_key {order}
+    ''',
+    'list': '''
+        SELECT list_id, list_key FROM dim_list
+        WHERE is_current = TRUE {filter}
+        ORDER BY list_key {order}
+    ''',
+    'book': '''
+        SELECT primary_isbn13, book_key FROM dim_book
+        WHERE is_current = TRUE {filter}
+        ORDER BY book_key {order}
+    '''
+}
+
+DIMENSION_FILTERS = {
+    'publisher': "AND publisher_name = ANY(%s)",
+    'list': "AND list_id = ANY(%s)",
+    'book': "AND primary_isbn13 = ANY(%s)"
+}
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is not None:
+            self.data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
+class DimensionKeyCache:
+    """In-process surrogate key cache for publisher, list and book.
+
+    Keys learned inside a load are staged on a KeyCacheTransaction and only
+    published to the shared cache after the database transaction commits, so a
+    rollback never leaves keys for rows that do not exist.
+    """
+
+    def __init__(self, maxsize=KEY_CACHE_SIZE):
+        self.caches = {dimension: LRUCache(maxsize) for dimension in DIMENSION_LOOKUPS}
+        self.lock = threading.Lock()
+
+    def get(self, dimension, natural_key):
+        with self.lock:
+            return self.caches[dimension].get(natural_key)
+
+    def update(self, dimension, mapping):
+        with self.lock:
+            cache = self.caches[dimension]
+            for natural_key, surrogate_key in mapping.items():
+                cache.put(natural_key, surrogate_key)
+
+    def clear(self):
+        with self.lock:
+            for cache in self.caches.values():
+                cache.clear()
+
+    def warm(self, conn):
+        """Bulk-load the most recent current rows of every dimension."""
+        cursor = conn.cursor()
+        try:
+            for dimension, query in DIMENSION_LOOKUPS.items():
+                maxsize = self.caches[dimension].maxsize
+                # Newest rows last so they are the most recently used
+                cursor.execute(
+                    f"SELECT * FROM ({query.format(filter='', order='DESC')} LIMIT %s) recent ORDER BY 2",
+                    (maxsize,)
+                )
+                self.update(dimension, dict(cursor.fetchall()))
+            conn.commit()
+        finally:
+            cursor.close()
+        logger.info(
+            "Warmed dimension key cache: publisher=%d, list=%d, book=%d",
+            len(self.caches['publisher']), len(self.caches['list']), len(self.caches['book'])
+        )
+
+    def begin(self):
+        return KeyCacheTransaction(self)
+
+
+class KeyCacheTransaction:
+    """Keys resolved within one database transaction, or one savepoint of it.
+
+    A savepoint's keys are looked up before its parent's and the shared
+    cache's, and reach the parent only when it commits (the savepoint is
+    released), so later savepoints see versions created by earlier ones.
+    """
+
+    def __init__(self, cache, parent=None):
+        self.cache = cache
+        self.parent = parent
+        self.pending = {dimension: {} for dimension in DIMENSION_LOOKUPS}
+
+    def savepoint(self):
+        return KeyCacheTransaction(self.cache, parent=self)
+
+    def stage(self, dimension, mapping):
+        self.pending[dimension].update(mapping)
+
+    def _lookup(self, dimension, natural_key):
+        transaction = self
+        while transaction is not None:
+            surrogate_key = transaction.pending[dimension].get(natural_key)
+            if surrogate_key is not None:
+                return surrogate_key
+            transaction = transaction.parent
+        return self.cache.get(dimension, natural_key)
+
+    def resolve(self, cursor, dimension, natural_keys):
+        """Map natural keys to surrogate keys, fetching all misses in one query."""
+        resolved = {}
+        misses = []
+        for natural_key in set(natural_keys):
+            surrogate_key = self._lookup(dimension, natural_key)
+            if surrogate_key is None:
+                misses.append(natural_key)
+            else:
+                resolved[natural_key] = surrogate_key
+
+        if misses:
+            query = DIMENSION_LOOKUPS[dimension].format(filter=DIMENSION_FILTERS[dimension], order='ASC')
+            cursor.execute(query, (misses,))
+            found = dict(cursor.fetchall())
+            self.stage(dimension, found)
+            resolved.update(found)
+        return resolved
+
+    def commit(self):
+        """Publish keys to the parent transaction, or to the shared cache."""
+        for dimension, mapping in self.pending.items():
+            if self.parent is not None:
+                self.parent.stage(dimension, mapping)
+            else:
+                self.cache.update(dimension, mapping)
+        self.discard()
+
+    def discard(self):
+        for mapping in self.pending.values():
+            mapping.clear()
+
+
+key_cache = DimensionKeyCache()
@@ -1,132 +1,537 @@
 #load.py
-import psycopg2
-from datetime import datetime
-import yaml
+import os
+from collections import Counter
+from src.etl.key_cache import key_cache
+from src.etl.metrics import ROWS_WRITTEN
+from src.etl.transform import collect_records, to_date_key
 from src.etl.utils.logger import get_logger
 
 logger = get_logger()
-def load_data(transformed_data, conn):
+
+# 'bulk' streams each entity batch through COPY into staging tables and merges
+# with one set-based statement per table; 'row' is the original per-row path.
+LOAD_MODE = os.getenv('LOAD_MODE', 'bulk')
+
+# 'incremental' re-aggregates fact_publisher_performance only for the date keys
+# in the current batch; 'full' re-aggregates all of fact_book_rankings.
+PERFORMANCE_REFRESH_MODE = os.getenv('PERFORMANCE_REFRESH_MODE', 'incremental')
+
+# Tables refreshed by ANALYZE after a load
+# Advisory lock held from the dimension merges until the load commits.
+# Concurrent loaders (LOAD_WORKERS, backfill workers) would otherwise run the
+# SCD merges against the same snapshot and each insert a current row for a new
+# or changed key; 0010 rejects such duplicates at commit.
+DIMENSION_MERGE_LOCK = 7343
+
+WAREHOUSE_TABLES = [
+    'dim_date', 'dim_publisher', 'dim_list', 'dim_book',
+    'fact_book_rankings', 'fact_publisher_performance', 'load_status'
+]
+
+# Staging tables used by the bulk path. They live for one transaction only.
+# TEMP tables are never WAL-logged, so they already skip what UNLOGGED would.
+STAGING_TABLES = {
+    'stg_date': '''
+        date_key INT, full_date DATE, year INT, quarter INT, quarter_name VARCHAR(10),
+        month INT, month_name VARCHAR(20), week_of_year INT, week_start_date DATE,
+        week_end_date DATE, bestsellers_date DATE, published_date DATE,
+        previous_published_date DATE, next_published_date DATE
+    ''',
+    'stg_publisher': '''
+        publisher_name VARCHAR(255), effective_start_date DATE
+    ''',
+    'stg_list': '''
+        ord SERIAL, list_id INT, list_name VARCHAR(255), display_name VARCHAR(255),
+        update_frequency VARCHAR(50), list_image_url VARCHAR(500),
+        effective_start_date DATE, row_hash CHAR(32)
+    ''',
+    'stg_book': '''
+        ord SERIAL, title VARCHAR(255), author VARCHAR(255), contributor VARCHAR(255),
+        contributor_note TEXT, age_group VARCHAR(50), publisher_key INT,
+        primary_isbn13 VARCHAR(13), primary_isbn10 VARCHAR(10), description TEXT,
+        created_date TIMESTAMP, updated_date TIMESTAMP, effective_start_date DATE,
+        row_hash CHAR(32)
+    ''',
+    'stg_ranking': '''
+        date_key INT, book_key INT, list_key INT, rank INT, price DECIMAL(10,2)
+    '''
+}
+
+# SCD Type 2 merges shared by both load paths. {source} is either a staging
+# table or a single row of parameters. Versions start on the payload's
+# published_date. Incoming rows whose row_hash matches the current version are
+# dropped; changed rows close the prior version and insert a new one in the
+# same statement. A version that started on the same date is updated in place
+# instead, which keeps uk_*_dates unique. Rows older than the current version
+# (weeks loaded out of order) never replace it.
+MERGE_PUBLISHER_SQL = '''
+    INSERT INTO dim_publisher (
+        publisher_name, effective_start_date, is_current
+    )
+    SELECT DISTINCT ON (i.publisher_name) i.publisher_name, i.effective_start_date, TRUE
+    FROM {source} i
+    WHERE NOT EXISTS (
+        SELECT 1 FROM dim_publisher p
+        WHERE p.publisher_name = i.publisher_name AND p.is_current = TRUE
+    )
+    ORDER BY i.publisher_name, i.effective_start_date
+    ON CONFLICT ON CONSTRAINT uk_publisher_name_dates DO NOTHING
+    RETURNING publisher_name, publisher_key
+'''
+
+MERGE_LIST_SQL = '''
+    WITH changed AS (
+        SELECT i.*
+        FROM {source} i
+        LEFT JOIN dim_list d ON d.list_id = i.list_id AND d.is_current = TRUE
+        WHERE d.list_key IS NULL
+           OR (d.row_hash IS DISTINCT FROM i.row_hash
+               AND d.effective_start_date <= i.effective_start_date)
+    ),
+    closed AS (
+        UPDATE dim_list d
+        SET is_current = FALSE, effective_end_date = c.effective_start_date
+        FROM changed c
+        WHERE d.list_id = c.list_id AND d.is_current = TRUE
+          AND d.effective_start_date < c.effective_start_date
+    )
+    INSERT INTO dim_list (
+        list_id, list_name, display_name, update_frequency,
+        list_image_url, row_hash, effective_start_date, is_current
+    )
+    SELECT
+        list_id, list_name, display_name, update_frequency,
+        list_image_url, row_hash, effective_start_date, TRUE
+    FROM changed
+    ON CONFLICT ON CONSTRAINT uk_list_id_dates DO UPDATE SET
+        list_name = EXCLUDED.list_name,
+        display_name = EXCLUDED.display_name,
+        update_frequency = EXCLUDED.update_frequency,
+        list_image_url = EXCLUDED.list_image_url,
+        row_hash = EXCLUDED.row_hash,
+        effective_end_date = NULL,
+        is_current = TRUE
+    RETURNING list_id, list_key
+'''
+
+MERGE_BOOK_SQL = '''
+    WITH changed AS (
+        SELECT i.*
+        FROM {source} i
+        LEFT JOIN dim_book d ON d.primary_isbn13 = i.primary_isbn13 AND d.is_current = TRUE
+        WHERE i.primary_isbn13 IS NOT NULL
+          AND i.publisher_key IS NOT NULL
+          AND (d.book_key IS NULL
+               OR (d.row_hash IS DISTINCT FROM i.row_hash
+                   AND d.effective_start_date <= i.effective_start_date))
+    ),
+    closed AS (
+        UPDATE dim_book d
+        SET is_current = FALSE, effective_end_date = c.effective_start_date
+        FROM changed c
+        WHERE d.primary_isbn13 = c.primary_isbn13 AND d.is_current = TRUE
+          AND d.effective_start_date < c.effective_start_date
+    )
+    INSERT INTO dim_book (
+        title, author, contributor, contributor_note, age_group,
+        publisher_key, primary_isbn13, primary_isbn10, description,
+        created_date, updated_date, row_hash, effective_start_date, is_current
+    )
+    SELECT
+        title, author, contributor, contributor_note, age_group,
+        publisher_key, primary_isbn13, primary_isbn10, description,
+        created_date, updated_date, row_hash, effective_start_date, TRUE
+    FROM changed
+    ON CONFLICT ON CONSTRAINT uk_isbn13_dates DO UPDATE SET
+        title = EXCLUDED.title,
+        author = EXCLUDED.author,
+        contributor = EXCLUDED.contributor,
+        contributor_note = EXCLUDED.contributor_note,
+        age_group = EXCLUDED.age_group,
+        publisher_key = EXCLUDED.publisher_key,
+        primary_isbn10 = EXCLUDED.primary_isbn10,
+        description = EXCLUDED.description,
+        updated_date = EXCLUDED.updated_date,
+        row_hash = EXCLUDED.row_hash,
+        effective_end_date = NULL,
+        is_current = TRUE
+    RETURNING primary_isbn13, book_key
+'''
+
+
+def load_data(transformed_data, conn, mode=None, commit=True, keys=None):
+    """Load a transform batch, or a stream of records from iter_records.
+
+    A stream is grouped per entity first: publisher keys must be known before
+    books are staged, and book and list keys before rankings. Each entity's
+    records are then rendered into COPY as it reads, without a text buffer.
+
+    With commit=False the caller owns the transaction: nothing is committed
+    or rolled back here, and the caller publishes keys (a KeyCacheTransaction)
+    and the returned row counts once its transaction commits.
+
+    Returns the number of rows written per table.
+    """
+    mode = mode or LOAD_MODE
+    if not isinstance(transformed_data, dict):
+        transformed_data = collect_records(transformed_data)
     cursor = conn.cursor()
-    logger.info("Starting data load...")
+    keys = keys or key_cache.begin()
+    written = Counter()
+    logger.info("Starting data load (%s mode)...", mode)
 
     try:
-        # Load dim_date with enhanced fields
-        for date in transformed_data['dates']:
-            cleaned_date_values = tuple(value if value != '' else None for value in date.values())
-            cursor.execute('''
-                INSERT INTO dim_date (
-                    date_key, full_date, year, quarter, quarter_name, month, month_name,
-                    week_of_year, week_start_date, week_end_date, bestsellers_date,
-                    published_date, previous_published_date, next_published_date
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (date_key) DO UPDATE SET
-                    bestsellers_date = EXCLUDED.bestsellers_date,
-                    previous_published_date = EXCLUDED.previous_published_date,
-                    next_published_date = EXCLUDED.next_published_date
-            ''', cleaned_date_values)
-
-        # Load dim_publisher with SCD Type 2
-        for publisher in transformed_data['publishers']:
-            cursor.execute('''
-                INSERT INTO dim_publisher (
-                    publisher_name, effective_start_date, is_current
-                )
-                VALUES (%s, %s, TRUE)
-                ON CONFLICT ON CONSTRAINT uk_publisher_name_dates DO NOTHING
-            ''', (publisher['publisher_name'], datetime.now().date()))
-
-        # Load dim_list with SCD Type 2
-        for book_list in transformed_data['lists']:
-            cursor.execute('''
-                INSERT INTO dim_list (
-                    list_id, list_name, display_name, update_frequency,
-                    list_image_url, effective_start_date, is_current
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, TRUE)
-                ON CONFLICT ON CONSTRAINT uk_list_id_dates DO NOTHING
-            ''', tuple(book_list.values()))
-
-        # Load dim_book with enhanced fields and SCD Type 2
-        for book in transformed_data['books']:
-            cursor.execute('''
-                WITH publisher_key AS (
-                    SELECT publisher_key 
-                    FROM dim_publisher 
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (DIMENSION_MERGE_LOCK,))
+        if mode == 'bulk':
+            _load_bulk(cursor, transformed_data, keys, written)
+        elif mode == 'row':
+            _load_row_by_row(cursor, transformed_data, written)
+        else:
+            raise ValueError(f"Unknown load mode: {mode}")
+
+        if PERFORMANCE_REFRESH_MODE == 'full':
+            written['fact_publisher_performance'] += _refresh_publisher_performance(cursor)
+        else:
+            date_keys = sorted({date.date_key for date in transformed_data['dates']})
+            written['fact_publisher_performance'] += _refresh_publisher_performance(cursor, date_keys)
+
+        if commit:
+            conn.commit()
+            keys.commit()
+            record_rows_written(written)
+        logger.debug("Rows written: %s", dict(written))
+        logger.info("Data load completed successfully.")
+        return written
+    
+    except Exception as e:
+        logger.error("Data load failed: %s", e)
+        if commit:
+            conn.rollback()
+            keys.discard()
+        raise
+    
+    finally:
+        cursor.close()
+
+
+def record_rows_written(written):
+    """Count committed rows per table in the rows-written metric."""
+    for table, rows in written.items():
+        ROWS_WRITTEN.labels(table).inc(rows)
+
+
+def _copy_value(value):
+    """Render a value in COPY text format."""
+    if value is None:
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+class _CopyStream:
+    """Read-only file over rows in COPY text format, rendered as COPY reads it.
+
+    Only about one read() worth of text exists at a time, so a COPY never
+    holds a second, text copy of the entity's rows in memory.
+    """
+
+    def __init__(self, rows):
+        self.lines = ('\t'.join(_copy_value(value) for value in row) + '\n' for row in rows)
+        self.pending = ''
+
+    def read(self, size=-1):
+        parts = [self.pending]
+        length = len(self.pending)
+        while size < 0 or length < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            parts.append(line)
+            length += len(line)
+        text = ''.join(parts)
+        if size < 0 or length <= size:
+            self.pending = ''
+            return text
+        self.pending = text[size:]
+        return text[:size]
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def _copy_rows(cursor, table, columns, rows):
+    """Stream rows into a table with a single COPY FROM STDIN."""
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", _CopyStream(rows))
+
+
+def _create_staging_tables(cursor):
+    for table, columns in STAGING_TABLES.items():
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} ({columns}) ON COMMIT DROP")
+        cursor.execute(f"TRUNCATE {table}")
+
+
+def _load_bulk(cursor, transformed_data, keys, written):
+    """Load a transformed payload with COPY + one set-based merge per table.
+
+    Surrogate keys come from the dimension key cache, filled from RETURNING
+    clauses and one bulk lookup per dimension for misses, so books and
+    rankings are staged with their keys already resolved.
+    """
+    _create_staging_tables(cursor)
+
+    _copy_rows(cursor, 'stg_date', [
+        'date_key', 'full_date', 'year', 'quarter', 'quarter_name', 'month', 'month_name',
+        'week_of_year', 'week_start_date', 'week_end_date', 'bestsellers_date',
+        'published_date', 'previous_published_date', 'next_published_date'
+    ], (tuple(value if value != '' else None for value in date)
+        for date in transformed_data['dates']))
+
+    _copy_rows(cursor, 'stg_publisher', ['publisher_name', 'effective_start_date'],
+               (tuple(publisher) for publisher in transformed_data['publishers']))
+
+    _copy_rows(cursor, 'stg_list', [
+        'list_id', 'list_name', 'display_name', 'update_frequency',
+        'list_image_url', 'effective_start_date', 'row_hash'
+    ], (tuple(book_list) for book_list in transformed_data['lists']))
+
+    # Merge dim_date; DISTINCT ON keeps DO UPDATE from touching a row twice
+    cursor.execute('''
+        INSERT INTO dim_date (
+            date_key, full_date, year, quarter, quarter_name, month, month_name,
+            week_of_year, week_start_date, week_end_date, bestsellers_date,
+            published_date, previous_published_date, next_published_date
+        )
+        SELECT DISTINCT ON (date_key)
+            date_key, full_date, year, quarter, quarter_name, month, month_name,
+            week_of_year, week_start_date, week_end_date, bestsellers_date,
+            published_date, previous_published_date, next_published_date
+        FROM stg_date
+        ORDER BY date_key
+        ON CONFLICT (date_key) DO UPDATE SET
+            bestsellers_date = EXCLUDED.bestsellers_date,
+            published_date = EXCLUDED.published_date,
+            previous_published_date = EXCLUDED.previous_published_date,
+            next_published_date = EXCLUDED.next_published_date
+    ''')
+    written['dim_date'] += cursor.rowcount
+
+    # Merge dim_publisher; a name only gets a row when it has no current one
+    cursor.execute(MERGE_PUBLISHER_SQL.format(source='stg_publisher'))
+    keys.stage('publisher', dict(cursor.fetchall()))
+    written['dim_publisher'] += cursor.rowcount
+
+    # Merge dim_list with SCD Type 2; the latest occurrence of a list wins
+    cursor.execute(MERGE_LIST_SQL.format(
+        source='(SELECT DISTINCT ON (list_id) * FROM stg_list ORDER BY list_id, ord DESC)'
+    ))
+    keys.stage('list', dict(cursor.fetchall()))
+    written['dim_list'] += cursor.rowcount
+
+    # Books whose publisher has no current row are skipped, as the join did
+    publisher_keys = keys.resolve(cursor, 'publisher', (book.publisher for book in transformed_data['books']))
+    _copy_rows(cursor, 'stg_book', [
+        'title', 'author', 'contributor', 'contributor_note', 'age_group', 'publisher_key',
+        'primary_isbn13', 'primary_isbn10', 'description',
+        'created_date', 'updated_date', 'effective_start_date', 'row_hash'
+    ], ((
+        book.title, book.author, book.contributor, book.contributor_note,
+        book.age_group, publisher_keys[book.publisher], book.primary_isbn13,
+        book.primary_isbn10, book.description, book.created_date,
+        book.updated_date, book.effective_start_date, book.row_hash
+    ) for book in transformed_data['books'] if book.publisher in publisher_keys))
+
+    # Merge dim_book with SCD Type 2; the latest occurrence of an ISBN wins
+    cursor.execute(MERGE_BOOK_SQL.format(
+        source='(SELECT DISTINCT ON (primary_isbn13) * FROM stg_book ORDER BY primary_isbn13, ord DESC)'
+    ))
+    keys.stage('book', dict(cursor.fetchall()))
+    written['dim_book'] += cursor.rowcount
+
+    # Resolve fact keys client-side; date_key is computed as YYYYMMDD and
+    # rankings missing a book or list row are skipped, as the inner joins did
+    rankings = transformed_data['rankings']
+    book_keys = keys.resolve(cursor, 'book', (ranking.isbn13 for ranking in rankings))
+    list_keys = keys.resolve(cursor, 'list', (ranking.list_id for ranking in rankings))
+    _copy_rows(cursor, 'stg_ranking', [
+        'date_key', 'book_key', 'list_key', 'rank', 'price'
+    ], ((
+        to_date_key(ranking.published_date), book_keys[ranking.isbn13],
+        list_keys[ranking.list_id], ranking.rank, ranking.price
+    ) for ranking in rankings
+        if ranking.isbn13 in book_keys
+        and ranking.list_id in list_keys))
+
+    # Merge fact_book_rankings
+    cursor.execute('''
+        INSERT INTO fact_book_rankings (
+            date_key, book_key, list_key, rank, price
+        )
+        SELECT date_key, book_key, list_key, rank, price
+        FROM stg_ranking
+    ''')
+    written['fact_book_rankings'] += cursor.rowcount
+
+
+def _load_row_by_row(cursor, transformed_data, written):
+    """Per-row load path, kept as a fallback for the bulk loader."""
+    # Load dim_date with enhanced fields
+    for date in transformed_data['dates']:
+        cleaned_date_values = tuple(value if value != '' else None for value in date)
+        cursor.execute('''
+            INSERT INTO dim_date (
+                date_key, full_date, year, quarter, quarter_name, month, month_name,
+                week_of_year, week_start_date, week_end_date, bestsellers_date,
+                published_date, previous_published_date, next_published_date
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (date_key) DO UPDATE SET
+                bestsellers_date = EXCLUDED.bestsellers_date,
+                published_date = EXCLUDED.published_date,
+                previous_published_date = EXCLUDED.previous_published_date,
+                next_published_date = EXCLUDED.next_published_date
+        ''', cleaned_date_values)
+        written['dim_date'] += cursor.rowcount
+
+    # Load dim_publisher; a name only gets a row when it has no current one
+    for publisher in transformed_data['publishers']:
+        cursor.execute(
+            MERGE_PUBLISHER_SQL.format(
+                source='(SELECT %s::varchar AS publisher_name, %s::date AS effective_start_date)'
+            ),
+            tuple(publisher)
+        )
+        written['dim_publisher'] += cursor.rowcount
+
+    # Load dim_list with SCD Type 2
+    for book_list in transformed_data['lists']:
+        cursor.execute(MERGE_LIST_SQL.format(source='''(
+            SELECT %s::int AS list_id, %s::varchar AS list_name, %s::varchar AS display_name,
+                   %s::varchar AS update_frequency, %s::varchar AS list_image_url,
+                   %s::date AS effective_start_date, %s::char(32) AS row_hash
+        )'''), tuple(book_list))
+        written['dim_list'] += cursor.rowcount
+
+    # Load dim_book with enhanced fields and SCD Type 2
+    for book in transformed_data['books']:
+        cursor.execute(MERGE_BOOK_SQL.format(source='''(
+            SELECT %s::varchar AS title, %s::varchar AS author, %s::varchar AS contributor,
+                   %s::text AS contributor_note, %s::varchar AS age_group,
+                   (SELECT publisher_key FROM dim_publisher
                     WHERE publisher_name = %s AND is_current = TRUE
-                )
-                INSERT INTO dim_book (
-                    title, author, contributor, contributor_note, age_group,
-                    publisher_key, primary_isbn13, primary_isbn10, description,
-                    created_date, updated_date, effective_start_date, is_current
-                )
-                SELECT 
-                    %s, %s, %s, %s, %s, pk.publisher_key, %s, %s, %s, %s, %s, %s, TRUE
-                FROM publisher_key pk
-                ON CONFLICT ON CONSTRAINT uk_isbn13_dates DO NOTHING
-            ''', (
-                book['publisher'], book['title'], book['author'],
-                book['contributor'], book['contributor_note'], book['age_group'],
-                book['primary_isbn13'], book['primary_isbn10'], book['description'],
-                book['created_date'], book['updated_date'], book['effective_start_date']
-            ))
-
-        # Load fact_book_rankings with price
-        for ranking in transformed_data['rankings']:
-            cursor.execute('''
-                INSERT INTO fact_book_rankings (
-                    date_key, book_key, list_key, rank, price
-                )
-                SELECT 
-                    d.date_key, b.book_key, l.list_key, %s, %s
-                FROM dim_book b
-                JOIN dim_list l ON l.list_id = %s AND l.is_current = TRUE
-                JOIN dim_date d ON d.full_date = %s
-                WHERE b.primary_isbn13 = %s AND b.is_current = TRUE
-            ''', (
-                ranking['rank'], ranking['price'], ranking['list_id'],
-                ranking['published_date'], ranking['isbn13']
-            ))
-
-        # Load fact_publisher_performance with list dimension
+                    ORDER BY publisher_key DESC LIMIT 1) AS publisher_key,
+                   %s::varchar AS primary_isbn13, %s::varchar AS primary_isbn10,
+                   %s::text AS description, %s::timestamp AS created_date,
+                   %s::timestamp AS updated_date, %s::date AS effective_start_date,
+                   %s::char(32) AS row_hash
+        )'''), (
+            book.title, book.author, book.contributor,
+            book.contributor_note, book.age_group, book.publisher,
+            book.primary_isbn13, book.primary_isbn10, book.description,
+            book.created_date, book.updated_date, book.effective_start_date,
+            book.row_hash
+        ))
+        written['dim_book'] += cursor.rowcount
+
+    # Load fact_book_rankings with price
+    for ranking in transformed_data['rankings']:
         cursor.execute('''
-            INSERT INTO fact_publisher_performance (
-                publisher_key, date_key, list_key, quarter, year,
-                total_points, books_in_top_5,
-                rank_1_count, rank_2_count, rank_3_count, rank_4_count, rank_5_count
+            INSERT INTO fact_book_rankings (
+                date_key, book_key, list_key, rank, price
             )
             SELECT 
-                p.publisher_key, d.date_key, f.list_key,
-                d.quarter, d.year,
-                SUM(CASE WHEN f.rank <= 5 THEN (6 - f.rank) ELSE 0 END) AS total_points,
-                COUNT(CASE WHEN f.rank <= 5 THEN 1 END),
-                COUNT(CASE WHEN f.rank = 1 THEN 1 END),
-                COUNT(CASE WHEN f.rank = 2 THEN 1 END),
-                COUNT(CASE WHEN f.rank = 3 THEN 1 END),
-                COUNT(CASE WHEN f.rank = 4 THEN 1 END),
-                COUNT(CASE WHEN f.rank = 5 THEN 1 END)
-            FROM fact_book_rankings f
-            JOIN dim_book b ON f.book_key = b.book_key
-            JOIN dim_publisher p ON b.publisher_key = p.publisher_key
-            JOIN dim_date d ON f.date_key = d.date_key
-            GROUP BY p.publisher_key, d.date_key, f.list_key, d.quarter, d.year
-            ON CONFLICT ON CONSTRAINT uk_publisher_date_list DO UPDATE SET
-                total_points = EXCLUDED.total_points,
-                books_in_top_5 = EXCLUDED.books_in_top_5,
-                rank_1_count = EXCLUDED.rank_1_count,
-                rank_2_count = EXCLUDED.rank_2_count,
-                rank_3_count = EXCLUDED.rank_3_count,
-                rank_4_count = EXCLUDED.rank_4_count,
-                rank_5_count = EXCLUDED.rank_5_count
-        ''')
+                %s, b.book_key, l.list_key, %s, %s
+            FROM dim_book b
+            JOIN dim_list l ON l.list_id = %s AND l.is_current = TRUE
+            WHERE b.primary_isbn13 = %s AND b.is_current = TRUE
+        ''', (
+            to_date_key(ranking.published_date), ranking.rank, ranking.price,
+            ranking.list_id, ranking.isbn13
+        ))
+        written['fact_book_rankings'] += cursor.rowcount
+
 
+def analyze_tables(conn, tables=WAREHOUSE_TABLES):
+    """Refresh planner statistics after a load."""
+    cursor = conn.cursor()
+    try:
+        for table in tables:
+            cursor.execute(f"ANALYZE {table}")
         conn.commit()
-        logger.info("Data load completed successfully.")
-    
+        logger.info("Analyzed %d tables.", len(tables))
     except Exception as e:
-        logger.error(f"Data load failed: {e}")
+        logger.error("ANALYZE failed: %s", e)
         conn.rollback()
         raise
-    
     finally:
-        cursor.close()
\ No newline at end of file
+        cursor.close()
+
+
+def rebuild_publisher_performance(conn):
+    """Rebuild fact_publisher_performance from scratch for repairs."""
+    cursor = conn.cursor()
+    logger.info("Rebuilding fact_publisher_performance...")
+
+    try:
+        cursor.execute("DELETE FROM fact_publisher_performance")
+        _refresh_publisher_performance(cursor)
+        conn.commit()
+        logger.info("fact_publisher_performance rebuild completed successfully.")
+
+    except Exception as e:
+        logger.error("fact_publisher_performance rebuild failed: %s", e)
+        conn.rollback()
+        raise
+
+    finally:
+        cursor.close()
+
+
+def _refresh_publisher_performance(cursor, date_keys=None):
+    """Upsert publisher performance groups.
+
+    With date_keys, only the (publisher_key, date_key, list_key) groups for those
+    dates are recomputed, so the cost follows the batch size instead of history.
+    Returns the number of rows written.
+    """
+    if date_keys is not None and not date_keys:
+        return 0
+
+    date_filter = "WHERE f.date_key = ANY(%s)" if date_keys is not None else ""
+    params = (list(date_keys),) if date_keys is not None else None
+
+    # Load fact_publisher_performance with list dimension
+    cursor.execute(f'''
+        INSERT INTO fact_publisher_performance (
+            publisher_key, date_key, list_key, quarter, year,
+            total_points, books_in_top_5,
+            rank_1_count, rank_2_count, rank_3_count, rank_4_count, rank_5_count
+        )
+        SELECT 
+            p.publisher_key, d.date_key, f.list_key,
+            d.quarter, d.year,
+            SUM(CASE WHEN f.rank <= 5 THEN (6 - f.rank) ELSE 0 END) AS total_points,
+            COUNT(CASE WHEN f.rank <= 5 THEN 1 END),
+            COUNT(CASE WHEN f.rank = 1 THEN 1 END),
+            COUNT(CASE WHEN f.rank = 2 THEN 1 END),
+            COUNT(CASE WHEN f.rank = 3 THEN 1 END),
+            COUNT(CASE WHEN f.rank = 4 THEN 1 END),
+            COUNT(CASE WHEN f.rank = 5 THEN 1 END)
+        FROM fact_book_rankings f
+        JOIN dim_book b ON f.book_key = b.book_key
+        JOIN dim_publisher p ON b.publisher_key = p.publisher_key
+        JOIN dim_date d ON f.date_key = d.date_key
+        {date_filter}
+        GROUP BY p.publisher_key, d.date_key, f.list_key, d.quarter, d.year
+        ON CONFLICT ON CONSTRAINT uk_publisher_date_list DO UPDATE SET
+            total_points = EXCLUDED.total_points,
+            books_in_top_5 = EXCLUDED.books_in_top_5,
+            rank_1_count = EXCLUDED.rank_1_count,
+            rank_2_count = EXCLUDED.rank_2_count,
+            rank_3_count = EXCLUDED.rank_3_count,
+            rank_4_count = EXCLUDED.rank_4_count,
+            rank_5_count = EXCLUDED.rank_5_count
+    ''', params)
+    return cursor.rowcount
@@ -0,0 +1,69 @@
+# metrics.py
+import os
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server, write_to_textfile
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+# Long-running loads serve /metrics on METRICS_PORT; short-lived cron runs can
+# instead write METRICS_TEXTFILE for node_exporter's textfile collector.
+METRICS_PORT = int(os.getenv('METRICS_PORT', '8000'))  # 0 disables the server
+METRICS_TEXTFILE = os.getenv('METRICS_TEXTFILE')
+
+REGISTRY = CollectorRegistry()
+
+STAGE_SECONDS = Histogram(
+    'nyt_etl_stage_duration_seconds', 'Time spent per date in each pipeline stage',
+    ['stage'], registry=REGISTRY,
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+API_REQUESTS = Counter(
+    'nyt_etl_api_requests_total', 'NYT API requests by outcome',
+    ['outcome'], registry=REGISTRY
+)
+API_REQUEST_SECONDS = Histogram(
+    'nyt_etl_api_request_duration_seconds', 'Latency of individual NYT API requests',
+    registry=REGISTRY, buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+)
+API_RETRIES = Counter(
+    'nyt_etl_api_retries_total', 'NYT API requests retried by the client',
+    registry=REGISTRY
+)
+RESPONSE_CACHE = Counter(
+    'nyt_etl_response_cache_total', 'Raw response cache lookups',
+    ['result'], registry=REGISTRY
+)
+READ_CACHE = Counter(
+    'nyt_etl_read_cache_total', 'Read API result cache lookups',
+    ['query', 'result'], registry=REGISTRY
+)
+ROWS_WRITTEN = Counter(
+    'nyt_etl_rows_written_total', 'Rows inserted or updated per table by committed loads',
+    ['table'], registry=REGISTRY
+)
+LOAD_STATUS = Counter(
+    'nyt_etl_load_status_total', 'load_status transitions written',
+    ['status'], registry=REGISTRY
+)
+QUEUE_DEPTH = Gauge(
+    'nyt_etl_queue_depth', 'Items waiting in a pipeline queue',
+    ['queue'], registry=REGISTRY
+)
+WORKERS_IN_FLIGHT = Gauge(
+    'nyt_etl_workers_in_flight', 'Workers currently busy, by role',
+    ['role'], registry=REGISTRY
+)
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve /metrics over HTTP when a port is configured."""
+    if port:
+        start_http_server(port, registry=REGISTRY)
+        logger.info("Serving Prometheus metrics on :%s/metrics", port)
+
+
+def write_metrics_textfile(path=METRICS_TEXTFILE):
+    """Write the current metrics in the textfile collector format when configured."""
+    if path:
+        write_to_textfile(path, REGISTRY)
+        logger.info("Wrote Prometheus metrics to %s", path)
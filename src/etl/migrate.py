@@ -0,0 +1,102 @@
+# migrate.py
+import hashlib
+import os
+import re
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '../../postgres/migrations')
+
+# Serializes migration runs from concurrently starting workers
+MIGRATION_LOCK_KEY = 7341
+
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+
+def list_migrations(directory=MIGRATIONS_DIR):
+    """Return (version, name, path) for every migration file, in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    return migrations
+
+
+def run_migrations(conn, directory=MIGRATIONS_DIR):
+    """Apply pending migrations in order, each in its own transaction.
+
+    Applied versions are recorded in schema_migrations with a checksum; a
+    changed file is reported but never re-run.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                checksum CHAR(64) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        applied = dict(cursor.fetchall())
+        conn.commit()
+
+        applied_count = 0
+        for version, name, path in list_migrations(directory):
+            with open(path) as f:
+                sql = f.read()
+            checksum = hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+            if version in applied:
+                if applied[version] != checksum:
+                    logger.warning("Migration %04d_%s changed after it was applied", version, name)
+                continue
+
+            logger.info("Applying migration %04d_%s...", version, name)
+            try:
+                cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (version, name, checksum)
+                )
+                conn.commit()
+                applied_count += 1
+            except Exception as e:
+                conn.rollback()
+                logger.error("Migration %04d_%s failed: %s", version, name, e)
+                raise
+
+        logger.info("Schema is up to date (%d migrations applied).", applied_count)
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+        conn.commit()
+        cursor.close()
+
+
+def ensure_fact_partitions(conn, from_year, to_year):
+    """Create yearly fact partitions covering the given years.
+
+    Skipped with a warning when migration 0003 has not been applied (e.g. with
+    AUTO_MIGRATE=false): the fact tables are then unpartitioned and need none.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT to_regprocedure('ensure_fact_partitions(integer, integer)') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            conn.commit()
+            logger.warning(
+                "Fact tables are not partitioned (migration 0003 not applied); "
+                "run python -m src.scripts.run_migrations to partition them."
+            )
+            return
+        cursor.execute("SELECT ensure_fact_partitions(%s, %s)", (from_year, to_year))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
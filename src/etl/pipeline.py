@@ -0,0 +1,275 @@
+# pipeline.py
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from src.etl.cache import CacheMiss
+from src.etl.extract import extract_data
+from src.etl.transform import transform_data
+from src.etl.key_cache import key_cache
+from src.etl.load import load_data, record_rows_written
+from src.etl.metrics import LOAD_STATUS, STAGE_SECONDS
+from src.etl.rollups import REFRESH_ROLLUPS, refresh_rollups, touched_tables
+from src.etl.utils.logger import get_logger, log_context
+
+logger = get_logger()
+
+# First key of the two-key advisory lock taken while a bestsellers date loads,
+# so concurrent loaders never load the same weekly list twice.
+LOAD_LOCK_NAMESPACE = 7342
+
+
+def check_if_date_loaded(conn, bestsellers_date, commit=True):
+    """Check if data for the bestsellers date has already been loaded.
+
+    With commit=False the caller owns the transaction and errors propagate.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT status, updated_at 
+            FROM load_status 
+            WHERE bestsellers_date = %s
+            ORDER BY updated_at DESC
+            LIMIT 1;
+        """, (bestsellers_date,))
+        result = cursor.fetchone()
+        cursor.close()
+        return result[0] if result else None
+    except Exception as e:
+        logger.error("❌ Error checking load status: %s", e)
+        if not commit:
+            raise
+        conn.rollback()
+        return None
+
+def update_load_status(conn, requested_date, bestsellers_date, status, error_message=None, commit=True):
+    """Update load status with error tracking.
+
+    With commit=False the status is written in the caller's transaction and
+    errors propagate; the caller counts it in LOAD_STATUS after committing.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO load_status (
+                requested_date, 
+                bestsellers_date, 
+                status, 
+                error_message,
+                updated_at
+            )
+            VALUES (%s, %s, %s, %s, NOW())
+            ON CONFLICT (requested_date, bestsellers_date) 
+            DO UPDATE SET
+                status = EXCLUDED.status,
+                error_message = EXCLUDED.error_message,
+                updated_at = NOW();
+        ''', (requested_date, bestsellers_date, status, error_message))
+        cursor.close()
+        if commit:
+            conn.commit()
+            LOAD_STATUS.labels(status).inc()
+    except Exception as e:
+        logger.error("❌ Error updating load status: %s", e)
+        if not commit:
+            raise
+        conn.rollback()
+
+def extract_payload(date, rate_limiter=None, replay=False):
+    """Extract a date's payload, returning None on failure.
+
+    Retries live in the HTTP client so backoff delays are never stacked.
+    """
+    with log_context(date=date, stage='extract'):
+        try:
+            logger.info("🔍 Extracting data for %s", date)
+            with STAGE_SECONDS.labels('extract').time():
+                return extract_data(date, rate_limiter=rate_limiter, replay=replay)
+        except CacheMiss as e:
+            logger.error("❌ Replay failed for %s: %s", date, e)
+            return None
+        except Exception as e:
+            logger.error("❌ Extraction failed for %s: %s", date, e)
+            return None
+
+@contextmanager
+def bestsellers_lock(conn, bestsellers_date, xact=False):
+    """Hold a session advisory lock on a bestsellers date while it loads.
+
+    With xact=True the lock is transaction-scoped instead and is held until
+    the caller's transaction ends, which is when its data becomes visible.
+    """
+    cursor = conn.cursor()
+    if xact:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", (LOAD_LOCK_NAMESPACE, bestsellers_date.toordinal()))
+        cursor.close()
+        yield
+        return
+    cursor.execute("SELECT pg_advisory_lock(%s, %s)", (LOAD_LOCK_NAMESPACE, bestsellers_date.toordinal()))
+    try:
+        yield
+    finally:
+        try:
+            cursor.execute("SELECT pg_advisory_unlock(%s, %s)", (LOAD_LOCK_NAMESPACE, bestsellers_date.toordinal()))
+            cursor.close()
+        except Exception as e:
+            logger.warning("⚠️ Could not release load lock for %s: %s", bestsellers_date, e)
+
+def load_payload(conn, target_date, raw_data, touched=None):
+    """Transform and load an extracted payload, tracking it in load_status.
+
+    Rollups over the tables the load wrote are refreshed afterwards, unless a
+    touched set is passed: the tables are then added to it so the caller can
+    refresh once for a whole run.
+    """
+    with log_context(date=target_date):
+        return _load_payload(conn, target_date, raw_data, touched)
+
+def _load_payload(conn, target_date, raw_data, touched):
+    bestsellers_date = None
+    try:
+        if not raw_data:
+            raise Exception("Data extraction failed")
+
+        # Get bestsellers date
+        bestsellers_date = raw_data.get('results', {}).get('bestsellers_date')
+        if not bestsellers_date:
+            raise ValueError("No bestsellers date in response")
+
+        bestsellers_date = datetime.strptime(bestsellers_date, '%Y-%m-%d').date()
+
+        with bestsellers_lock(conn, bestsellers_date):
+            # Check existing status
+            current_status = check_if_date_loaded(conn, bestsellers_date)
+            if current_status == 'COMPLETED':
+                logger.info("✅ Data already loaded for %s", bestsellers_date)
+                return True
+
+            # Process data
+            update_load_status(conn, target_date, bestsellers_date, 'IN_PROGRESS')
+            with log_context(stage='transform'), STAGE_SECONDS.labels('transform').time():
+                transformed_data = transform_data(raw_data)
+            with log_context(stage='load'), STAGE_SECONDS.labels('load').time():
+                written = load_data(transformed_data, conn)
+
+            update_load_status(conn, target_date, bestsellers_date, 'COMPLETED')
+        logger.info("✅ Successfully processed %s", bestsellers_date)
+
+        tables = touched_tables(written)
+        if touched is not None:
+            touched.update(tables)
+        elif REFRESH_ROLLUPS and tables:
+            with log_context(stage='rollups'), STAGE_SECONDS.labels('rollups').time():
+                refresh_rollups(conn, tables)
+        return True
+
+    except Exception as e:
+        error_msg = str(e)
+        logger.error("❌ Error processing %s: %s", target_date, error_msg)
+        if bestsellers_date:
+            update_load_status(conn, target_date, bestsellers_date, 'FAILED', error_msg)
+        return False
+
+def _bestsellers_date(raw_data):
+    bestsellers_date = (raw_data or {}).get('results', {}).get('bestsellers_date')
+    return datetime.strptime(bestsellers_date, '%Y-%m-%d').date() if bestsellers_date else None
+
+def load_payloads_batched(conn, items, touched=None):
+    """Load several (target_date, raw_data) payloads in one transaction.
+
+    Each date runs inside its own savepoint, so a bad payload rolls back
+    alone and is recorded FAILED. COMPLETED and FAILED rows are written in
+    the same transaction as the data, so no IN_PROGRESS window exists, and
+    one commit covers the whole batch. Returns one result per item; rollups
+    are handled as in load_payload.
+    """
+    return load_batch(conn, [
+        (target_date, _bestsellers_date(raw_data), raw_data) for target_date, raw_data in items
+    ], touched=touched)
+
+def load_batch(conn, items, transform=transform_data, touched=None):
+    """Load (target_date, bestsellers_date, payload) items as load_payloads_batched does.
+
+    Payloads are passed through transform first; with transform=None they
+    are already transformed. Items without a bestsellers_date fail.
+    """
+    results = []
+    statuses = []
+    # Each date's keys live in a savepoint of the batch's, so a later date
+    # resolves versions an earlier one created rather than stale cached keys
+    batch_keys = key_cache.begin()
+    written = Counter()
+    cursor = conn.cursor()
+    try:
+        # Lock every date up front, in order: load_data holds the dimension
+        # merge lock until commit, so waiting for a date lock after it could
+        # deadlock with a loader that holds that date and waits for the merges
+        for bestsellers_date in sorted({item[1] for item in items if item[1]}):
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)",
+                           (LOAD_LOCK_NAMESPACE, bestsellers_date.toordinal()))
+
+        for target_date, bestsellers_date, payload in items:
+            with log_context(date=target_date):
+                if not bestsellers_date:
+                    logger.error("❌ Error processing %s: No bestsellers date in response", target_date)
+                    results.append(False)
+                    continue
+
+                keys = batch_keys.savepoint()
+                cursor.execute("SAVEPOINT load_date")
+                try:
+                    with bestsellers_lock(conn, bestsellers_date, xact=True):
+                        if check_if_date_loaded(conn, bestsellers_date, commit=False) == 'COMPLETED':
+                            logger.info("✅ Data already loaded for %s", bestsellers_date)
+                            cursor.execute("RELEASE SAVEPOINT load_date")
+                            keys.commit()
+                            results.append(True)
+                            continue
+                        transformed_data = payload
+                        if transform is not None:
+                            with log_context(stage='transform'), STAGE_SECONDS.labels('transform').time():
+                                transformed_data = transform(payload)
+                        with log_context(stage='load'), STAGE_SECONDS.labels('load').time():
+                            date_written = load_data(transformed_data, conn, commit=False, keys=keys)
+                        update_load_status(conn, target_date, bestsellers_date, 'COMPLETED', commit=False)
+                    cursor.execute("RELEASE SAVEPOINT load_date")
+                    keys.commit()
+                    written.update(date_written)
+                    statuses.append('COMPLETED')
+                    results.append(True)
+                except Exception as e:
+                    logger.error("❌ Error processing %s: %s", target_date, e)
+                    cursor.execute("ROLLBACK TO SAVEPOINT load_date")
+                    keys.discard()
+                    update_load_status(conn, target_date, bestsellers_date, 'FAILED', str(e), commit=False)
+                    statuses.append('FAILED')
+                    results.append(False)
+
+        conn.commit()
+    except Exception as e:
+        logger.error("❌ Batch of %d dates failed: %s", len(items), e)
+        conn.rollback()
+        batch_keys.discard()
+        return [False] * len(items)
+    finally:
+        cursor.close()
+
+    # Keys and counts are published only once the batch is durable
+    batch_keys.commit()
+    record_rows_written(written)
+    for status in statuses:
+        LOAD_STATUS.labels(status).inc()
+    logger.info("✅ Committed a batch of %d dates", len(items))
+
+    tables = touched_tables(written)
+    if touched is not None:
+        touched.update(tables)
+    elif REFRESH_ROLLUPS and tables:
+        with log_context(stage='rollups'), STAGE_SECONDS.labels('rollups').time():
+            refresh_rollups(conn, tables)
+    return results
+
+def process_date(conn, target_date, rate_limiter=None, replay=False, touched=None):
+    """Process a single date with comprehensive error handling."""
+    raw_data = extract_payload(target_date.strftime('%Y-%m-%d'), rate_limiter=rate_limiter, replay=replay)
+    return load_payload(conn, target_date, raw_data, touched=touched)
@@ -0,0 +1,104 @@
+# planner.py
+import threading
+from datetime import datetime, timedelta
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+# The overview endpoint returns the same weekly list for every day of a week.
+PUBLICATION_CADENCE = timedelta(days=7)
+
+
+class PublicationPlanner:
+    """Plan which dates to request for a backfill.
+
+    Walks the published_date -> next_published_date chain persisted in dim_date
+    and skips publications whose bestsellers_date is already COMPLETED in
+    load_status. Outside the known chain it steps by the weekly cadence, and
+    `observe` feeds chain links from fresh payloads back into the walk.
+    """
+
+    def __init__(self, start_date, end_date, publications=None, completed=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.publications = dict(publications or {})
+        self.completed = set(completed or ())
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_database(cls, conn, start_date, end_date):
+        """Load the known publication chain and load status for the range in one query."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT
+                    d.published_date,
+                    d.next_published_date,
+                    EXISTS (
+                        SELECT 1 FROM load_status ls
+                        WHERE ls.bestsellers_date = d.bestsellers_date
+                          AND ls.status = 'COMPLETED'
+                    ) AS is_completed
+                FROM dim_date d
+                WHERE d.full_date = d.published_date
+                  AND d.published_date BETWEEN %s AND %s
+            ''', (start_date - PUBLICATION_CADENCE, end_date))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        publications = {published: next_published for published, next_published, _ in rows}
+        completed = {published for published, _, is_completed in rows if is_completed}
+        logger.info(
+            "Planner found %d known publications, %d already loaded, between %s and %s",
+            len(publications), len(completed), start_date, end_date
+        )
+        return cls(start_date, end_date, publications, completed)
+
+    def observe(self, requested_date, raw_data):
+        """Record the chain link carried by a payload fetched for requested_date."""
+        results = (raw_data or {}).get('results', {})
+        published = results.get('published_date')
+        next_published = results.get('next_published_date')
+        if not published:
+            return
+        published = datetime.strptime(published, '%Y-%m-%d').date()
+        next_published = datetime.strptime(next_published, '%Y-%m-%d').date() if next_published else None
+        with self.lock:
+            self.publications.setdefault(published, next_published)
+            if requested_date != published:
+                self.publications.setdefault(requested_date, next_published)
+
+    def _known_publication_after(self, current):
+        """Return a known publication within the cadence window starting at current."""
+        window_end = current + PUBLICATION_CADENCE
+        candidates = [published for published in self.publications if current <= published < window_end]
+        return min(candidates) if candidates else None
+
+    def dates(self):
+        """Yield the dates that still need to be requested, in order."""
+        current = self.start_date
+        while current <= self.end_date:
+            with self.lock:
+                snapped = self._known_publication_after(current)
+            if snapped and snapped != current:
+                current = snapped
+                continue
+
+            if current not in self.completed:
+                yield current
+
+            with self.lock:
+                next_published = self.publications.get(current)
+            if next_published and next_published > current:
+                current = next_published
+            else:
+                current += PUBLICATION_CADENCE
+
+
+def calendar_dates(start_date, end_date):
+    """Yield every calendar day in the range, the unplanned fallback."""
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += timedelta(days=1)
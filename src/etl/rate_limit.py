@@ -0,0 +1,37 @@
+# rate_limit.py
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every extractor worker.
+
+    `rate` tokens are added per `per` seconds, up to `capacity`. `acquire`
+    blocks until a token is available, so the combined request rate of all
+    workers never exceeds the configured quota.
+    """
+
+    def __init__(self, rate, per=60.0, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.fill_rate = rate / per
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.fill_rate)
+        self.updated_at = now
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available and consume them."""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.fill_rate
+            time.sleep(wait)
@@ -0,0 +1,340 @@
+# read_api.py
+import functools
+import os
+import select
+import shelve
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple, Optional
+from src.etl.database import get_db_connection
+from src.etl.metrics import READ_CACHE
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+# Results are kept until a load completes (see CacheInvalidator); the TTL only
+# bounds staleness for processes that do not listen for completions.
+READ_CACHE_SIZE = int(os.getenv('READ_CACHE_SIZE', '1024'))
+READ_CACHE_TTL_SECONDS = int(os.getenv('READ_CACHE_TTL_SECONDS', '86400'))
+READ_CACHE_PATH = os.getenv('READ_CACHE_PATH')  # optional shelve file, one per process
+
+# Channel notified by 0007_load_completed_notify.sql
+LOAD_COMPLETED_CHANNEL = 'load_status_completed'
+LISTEN_POLL_SECONDS = 5
+# Reconnect delays after the listening connection fails, doubling up to the max
+LISTEN_RETRY_SECONDS = 1
+LISTEN_RETRY_MAX_SECONDS = 60
+
+# Stored in the disk cache so entries from before a newer load are dropped
+GENERATION_KEY = '__generation__'
+
+
+class ListLeader(NamedTuple):
+    list_id: int
+    list_name: str
+    display_name: str
+    published_date: date
+    title: str
+    author: str
+    primary_isbn13: str
+    publisher_name: str
+
+
+class PublisherPoints(NamedTuple):
+    publisher_name: str
+    year: int
+    quarter: int
+    total_points: int
+    books_in_top_5: int
+    rank_1_count: int
+    quarterly_rank: int
+
+
+class RankHistoryPoint(NamedTuple):
+    published_date: date
+    list_id: int
+    list_name: str
+    rank: int
+    price: Optional[Decimal]
+
+
+class ResultCache:
+    """Thread-safe TTL/LRU cache of query results, optionally backed by shelve.
+
+    Memory is checked first; with a path, misses fall back to the shelf and
+    every put is written through, so a restarted process starts warm. Entries
+    evicted from memory leave the shelf too, and the shelf is pruned to
+    maxsize live entries when opened.
+
+    epoch counts clears: a result computed before a clear is not stored.
+    """
+
+    def __init__(self, maxsize=READ_CACHE_SIZE, ttl_seconds=READ_CACHE_TTL_SECONDS, path=READ_CACHE_PATH):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.shelf = None
+        self.epoch = 0
+        self.generation = None
+
+    def _store(self):
+        if self.path and self.shelf is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.shelf = shelve.open(self.path)
+            self._prune_shelf()
+        return self.shelf
+
+    def _prune_shelf(self):
+        """Drop expired shelf entries and all but the maxsize most recently put."""
+        now = time.time()
+        entries = sorted(
+            ((key, self.shelf[key]) for key in self.shelf if key != GENERATION_KEY),
+            key=lambda item: item[1][0], reverse=True
+        )
+        for index, (key, entry) in enumerate(entries):
+            if index >= self.maxsize or self._expired(entry, now):
+                del self.shelf[key]
+
+    def _expired(self, entry, now):
+        return self.ttl_seconds > 0 and now >= entry[0]
+
+    def get(self, key):
+        """Return (True, value) for a live entry, else (False, None)."""
+        now = time.time()
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None and self._store() is not None:
+                entry = self.shelf.get(key)
+            if entry is None:
+                return False, None
+            if self._expired(entry, now):
+                self._remove(key)
+                return False, None
+            self.data[key] = entry
+            self.data.move_to_end(key)
+            self._evict()
+            return True, entry[1]
+
+    def put(self, key, value, epoch=None):
+        """Store a result unless the cache was cleared since epoch was read."""
+        entry = (time.time() + self.ttl_seconds, value)
+        with self.lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            self.data[key] = entry
+            self.data.move_to_end(key)
+            if self._store() is not None:
+                self.shelf[key] = entry
+            self._evict()
+
+    def _evict(self):
+        while len(self.data) > self.maxsize:
+            key, _ = self.data.popitem(last=False)
+            if self.shelf is not None:
+                self.shelf.pop(key, None)
+
+    def _remove(self, key):
+        self.data.pop(key, None)
+        if self.shelf is not None:
+            self.shelf.pop(key, None)
+
+    def clear(self, generation=None):
+        """Drop every entry; generation records the load it was cleared for."""
+        with self.lock:
+            self.epoch += 1
+            self.data.clear()
+            if generation is not None:
+                self.generation = generation
+            if self._store() is not None:
+                self.shelf.clear()
+                if generation is not None:
+                    self.shelf[GENERATION_KEY] = generation
+                self.shelf.sync()
+
+    def sync_generation(self, generation):
+        """Clear entries, in memory or persisted, cached before the given load generation."""
+        with self.lock:
+            if self.generation is None and self._store() is not None:
+                self.generation = self.shelf.get(GENERATION_KEY)
+            stale = self.generation != generation
+        if stale:
+            logger.info("Dropping read cache entries from before %s", generation)
+            self.clear(generation)
+
+    def close(self):
+        with self.lock:
+            if self.shelf is not None:
+                self.shelf.close()
+                self.shelf = None
+
+
+read_cache = ResultCache()
+
+
+def cached(query):
+    """Serve a read function from read_cache, keyed on its arguments after conn.
+
+    Callers share cached values, so read functions return tuples, not lists.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            key = repr((query, args, sorted(kwargs.items())))
+            hit, value = read_cache.get(key)
+            READ_CACHE.labels(query, 'hit' if hit else 'miss').inc()
+            if hit:
+                return value
+            # A load completing mid-query clears the cache; drop this result then
+            epoch = read_cache.epoch
+            value = func(conn, *args, **kwargs)
+            read_cache.put(key, value, epoch)
+            return value
+        return wrapper
+    return decorator
+
+
+def _fetch(conn, query, params=None):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.commit()
+    finally:
+        cursor.close()
+    return rows
+
+
+def latest_completion(conn):
+    """When the newest COMPLETED load_status row was written; the cache generation.
+
+    Any completion moves it, including backfills of older dates.
+    """
+    rows = _fetch(conn, "SELECT MAX(updated_at) FROM load_status WHERE status = 'COMPLETED'")
+    return rows[0][0].isoformat() if rows[0][0] else None
+
+
+@cached('current_number_ones')
+def current_number_ones(conn):
+    """The #1 book of every list in its most recent published week."""
+    return tuple(ListLeader(*row) for row in _fetch(conn, '''
+        SELECT DISTINCT ON (l.list_id)
+            l.list_id, l.list_name, l.display_name, d.full_date,
+            b.title, b.author, b.primary_isbn13, p.publisher_name
+        FROM fact_book_rankings f
+        JOIN dim_list l ON f.list_key = l.list_key
+        JOIN dim_book b ON f.book_key = b.book_key
+        JOIN dim_publisher p ON b.publisher_key = p.publisher_key
+        JOIN dim_date d ON f.date_key = d.date_key
+        WHERE f.rank = 1
+        ORDER BY l.list_id, f.date_key DESC
+    '''))
+
+
+@cached('publisher_points')
+def publisher_points(conn, year=None, quarter=None, limit=10):
+    """Top publishers by points for a quarter, by default the latest one loaded.
+
+    Aggregates fact_publisher_performance, which is written in the load's own
+    transaction, so results are never older than the completion that
+    invalidated them (the materialized rollups refresh afterwards).
+    """
+    return tuple(PublisherPoints(*row) for row in _fetch(conn, '''
+        WITH target AS (
+            SELECT year, quarter FROM fact_publisher_performance
+            WHERE (%(year)s IS NULL OR year = %(year)s)
+              AND (%(quarter)s IS NULL OR quarter = %(quarter)s)
+            ORDER BY year DESC, quarter DESC
+            LIMIT 1
+        )
+        SELECT
+            p.publisher_name, pp.year, pp.quarter,
+            SUM(pp.total_points) AS total_points,
+            SUM(pp.books_in_top_5) AS books_in_top_5,
+            SUM(pp.rank_1_count) AS rank_1_count,
+            RANK() OVER (ORDER BY SUM(pp.total_points) DESC) AS quarterly_rank
+        FROM fact_publisher_performance pp
+        JOIN target t ON pp.year = t.year AND pp.quarter = t.quarter
+        JOIN dim_publisher p ON pp.publisher_key = p.publisher_key
+        GROUP BY p.publisher_name, pp.year, pp.quarter
+        ORDER BY total_points DESC, p.publisher_name
+        LIMIT %(limit)s
+    ''', {'year': year, 'quarter': quarter, 'limit': limit}))
+
+
+@cached('rank_history')
+def rank_history(conn, primary_isbn13):
+    """Every weekly rank of a book across lists, over all its SCD versions."""
+    return tuple(RankHistoryPoint(*row) for row in _fetch(conn, '''
+        SELECT d.full_date, l.list_id, l.list_name, f.rank, f.price
+        FROM fact_book_rankings f
+        JOIN dim_book b ON f.book_key = b.book_key
+        JOIN dim_list l ON f.list_key = l.list_key
+        JOIN dim_date d ON f.date_key = d.date_key
+        WHERE b.primary_isbn13 = %s
+        ORDER BY d.full_date, l.list_id
+    ''', (primary_isbn13,)))
+
+
+class CacheInvalidator:
+    """Clear read_cache whenever a load_status row becomes COMPLETED.
+
+    LISTENs on its own autocommit connection in a background thread, so
+    callers' connections stay free for queries. A failed connection is
+    reopened with backoff; each time it (re)connects, entries cached before
+    the latest completion are dropped, so loads that completed while it was
+    disconnected still invalidate the cache.
+    """
+
+    def __init__(self, cache=read_cache, poll_seconds=LISTEN_POLL_SECONDS,
+                 retry_seconds=LISTEN_RETRY_SECONDS, retry_max_seconds=LISTEN_RETRY_MAX_SECONDS):
+        self.cache = cache
+        self.poll_seconds = poll_seconds
+        self.retry_seconds = retry_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="read-cache-invalidator", daemon=True)
+
+    def _run(self):
+        delay = self.retry_seconds
+        while not self.stopped.is_set():
+            conn = None
+            try:
+                conn = get_db_connection()
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {LOAD_COMPLETED_CHANNEL}")
+                self.cache.sync_generation(latest_completion(conn))
+                delay = self.retry_seconds
+                self._listen(conn)
+            except Exception as e:
+                # The TTL still bounds staleness until the connection is back
+                logger.error("Read cache invalidation failed: %s; reconnecting in %.0fs", e, delay)
+                self.stopped.wait(delay)
+                delay = min(delay * 2, self.retry_max_seconds)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _listen(self, conn):
+        while not self.stopped.is_set():
+            if select.select([conn], [], [], self.poll_seconds) == ([], [], []):
+                continue
+            conn.poll()
+            if conn.notifies:
+                dates = sorted({notify.payload for notify in conn.notifies})
+                conn.notifies.clear()
+                logger.info("Load completed for %s; clearing read cache", ", ".join(dates))
+                self.cache.clear(latest_completion(conn))
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
@@ -0,0 +1,53 @@
+# rollups.py
+import os
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+# Set to false to leave rollup refreshes to a separate job
+REFRESH_ROLLUPS = os.getenv('REFRESH_ROLLUPS', 'true').lower() == 'true'
+
+# Materialized views from 0004_dashboard_rollups.sql and the tables they read;
+# a view is only refreshed when a load wrote to one of them
+ROLLUP_SOURCES = {
+    'mv_publisher_quarterly_leaderboard': {'fact_publisher_performance', 'dim_publisher'},
+    'mv_publisher_yearly_leaderboard': {'fact_publisher_performance', 'dim_publisher'},
+    'mv_book_list_stats': {'fact_book_rankings', 'dim_book'},
+    'mv_list_churn': {'fact_book_rankings', 'dim_list'},
+}
+
+
+def touched_tables(written):
+    """Tables with at least one row written, from load_data's per-table counts."""
+    return {table for table, rows in (written or {}).items() if rows}
+
+
+def stale_rollups(tables):
+    """Rollups that read from any of the given tables."""
+    return [view for view, sources in ROLLUP_SOURCES.items() if sources & set(tables)]
+
+
+def refresh_rollups(conn, tables=None):
+    """REFRESH MATERIALIZED VIEW CONCURRENTLY for rollups over the given tables.
+
+    With tables=None every rollup is refreshed. Each view is refreshed and
+    committed on its own, so dashboards keep reading the previous contents
+    until the new ones are ready. Returns the views refreshed.
+    """
+    views = list(ROLLUP_SOURCES) if tables is None else stale_rollups(tables)
+    refreshed = []
+    cursor = conn.cursor()
+    try:
+        for view in views:
+            try:
+                cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+                conn.commit()
+                refreshed.append(view)
+            except Exception as e:
+                conn.rollback()
+                logger.error("Refreshing %s failed: %s", view, e)
+    finally:
+        cursor.close()
+    if refreshed:
+        logger.info("Refreshed rollups: %s", ", ".join(refreshed))
+    return refreshed
@@ -1,102 +1,216 @@
 # transform.py
-from datetime import datetime, timedelta
+import hashlib
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional
 from src.etl.utils.logger import get_logger
 
 logger = get_logger()
 
+
+class DateRecord(NamedTuple):
+    date_key: int
+    full_date: str
+    year: int
+    quarter: int
+    quarter_name: str
+    month: int
+    month_name: str
+    week_of_year: int
+    week_start_date: str
+    week_end_date: str
+    bestsellers_date: Optional[str]
+    published_date: Optional[str]
+    previous_published_date: Optional[str]
+    next_published_date: Optional[str]
+
+
+class PublisherRecord(NamedTuple):
+    publisher_name: str
+    effective_start_date: object
+
+
+class ListRecord(NamedTuple):
+    list_id: int
+    list_name: str
+    display_name: str
+    update_frequency: str
+    list_image_url: Optional[str]
+    effective_start_date: object
+    row_hash: str
+
+
+class BookRecord(NamedTuple):
+    title: str
+    author: str
+    contributor: str
+    contributor_note: str
+    age_group: str
+    publisher: str
+    primary_isbn13: str
+    primary_isbn10: str
+    description: str
+    created_date: datetime
+    updated_date: datetime
+    effective_start_date: object
+    row_hash: str
+
+
+class RankingRecord(NamedTuple):
+    isbn13: str
+    list_id: int
+    rank: int
+    price: object
+    published_date: str
+
+
+# Keys of the batch dict produced by transform_data, per record type
+RECORD_GROUPS = {
+    DateRecord: 'dates',
+    PublisherRecord: 'publishers',
+    ListRecord: 'lists',
+    BookRecord: 'books',
+    RankingRecord: 'rankings'
+}
+
+
 def clean_date(value):
     return value if value else None
 
 
-def transform_data(raw_data):
+def row_hash(*values):
+    """Hash the SCD Type 2 tracked attributes of a dimension row."""
+    joined = '\x1f'.join('' if value is None else str(value) for value in values)
+    return hashlib.md5(joined.encode('utf-8')).hexdigest()
+
+
+def to_date_key(value):
+    """dim_date key for a date or 'YYYY-MM-DD' string, e.g. 20240107."""
+    return int(str(value).replace('-', ''))
+
+
+@lru_cache(maxsize=8192)
+def parse_timestamp(value):
+    """Parse an API 'YYYY-MM-DD HH:MM:SS' timestamp; repeated values are memoized."""
+    return datetime.fromisoformat(value)
+
+
+def build_date_record(results):
+    """Build the dim_date record for a payload's published_date."""
+    date_str = results['published_date']
+    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+    quarter = (date_obj.month - 1) // 3 + 1
+    return DateRecord(
+        date_key=to_date_key(date_str),
+        full_date=date_str,
+        year=date_obj.year,
+        quarter=quarter,
+        quarter_name=f"Q{quarter} {date_obj.year}",
+        month=date_obj.month,
+        month_name=date_obj.strftime('%B'),
+        week_of_year=date_obj.isocalendar()[1],
+        week_start_date=(date_obj - timedelta(days=date_obj.weekday())).strftime('%Y-%m-%d'),
+        week_end_date=(date_obj + timedelta(days=6 - date_obj.weekday())).strftime('%Y-%m-%d'),
+        bestsellers_date=clean_date(results.get('bestsellers_date')),
+        published_date=clean_date(date_str),
+        previous_published_date=clean_date(results.get('previous_published_date')),
+        next_published_date=clean_date(results.get('next_published_date'))
+    )
+
+
+def iter_records(raw_data, run_date=None):
+    """Yield compact typed records for one overview payload.
+
+    Publishers are yielded once, the first time they appear. Dimension
+    versions take effect on the payload's published_date, so a backfill run
+    on one day still records each week's changes as their own SCD versions;
+    run_date is only used for payloads without one.
+    """
+    results = raw_data.get('results', {})
+    if results.get('published_date'):
+        effective_date = datetime.strptime(results['published_date'], '%Y-%m-%d').date()
+    else:
+        # Taken once per payload rather than once per row
+        effective_date = run_date or date.today()
+
+    # Only create date dimension for published_date
+    if results.get('published_date'):
+        yield build_date_record(results)
+
+    seen_publishers = set()
+    for book_list in results.get('lists', []):
+        list_id = book_list['list_id']
+        list_image_url = book_list.get('list_image', '')
+        yield ListRecord(
+            list_id=list_id,
+            list_name=book_list['list_name'],
+            display_name=book_list['display_name'],
+            update_frequency=book_list['updated'],
+            list_image_url=list_image_url,
+            effective_start_date=effective_date,
+            row_hash=row_hash(
+                book_list['list_name'], book_list['display_name'],
+                book_list['updated'], list_image_url
+            )
+        )
+
+        for book in book_list.get('books', []):
+            publisher = book['publisher']
+            if publisher not in seen_publishers:
+                seen_publishers.add(publisher)
+                yield PublisherRecord(publisher, effective_date)
+
+            description = book.get('description', '')
+            yield BookRecord(
+                title=book['title'],
+                author=book['author'],
+                contributor=book['contributor'],
+                contributor_note=book['contributor_note'],
+                age_group=book['age_group'],
+                publisher=publisher,
+                primary_isbn13=book['primary_isbn13'],
+                primary_isbn10=book['primary_isbn10'],
+                description=description,
+                created_date=parse_timestamp(book['created_date']),
+                updated_date=parse_timestamp(book['updated_date']),
+                effective_start_date=effective_date,
+                row_hash=row_hash(
+                    book['title'], book['author'], book['contributor'],
+                    book['contributor_note'], book['age_group'], publisher,
+                    book['primary_isbn10'], description
+                )
+            )
+
+            yield RankingRecord(
+                isbn13=book['primary_isbn13'],
+                list_id=list_id,
+                rank=book['rank'],
+                price=book['price'],
+                published_date=results['published_date']
+            )
+
+
+def collect_records(records):
+    """Group a record stream into the batch dict the loader consumes."""
+    transformed = {group: [] for group in RECORD_GROUPS.values()}
+    seen_publishers = set()
+    for record in records:
+        if type(record) is PublisherRecord:
+            # Publishers repeat across payloads when streams are merged
+            if record.publisher_name in seen_publishers:
+                continue
+            seen_publishers.add(record.publisher_name)
+        transformed[RECORD_GROUPS[type(record)]].append(record)
+    return transformed
+
+
+def transform_data(raw_data, run_date=None):
     logger.info("Starting data transformation...")
     try:
-        results = raw_data.get('results', {})
-        transformed = {
-            'books': [],
-            'publishers': set(),  # Using set to avoid duplicates
-            'lists': [],
-            'rankings': [],
-            'dates': []
-        }
-
-        # Transform dates
-        date_fields = [
-            'published_date',
-            'bestsellers_date',
-            'previous_published_date',
-            'next_published_date'
-        ]
-
-        
-        
-        for field in date_fields:
-            if date_str := results.get(field):
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                if field == 'published_date':  # Only create date dimension for published_date
-                    transformed['dates'].append({
-                        'date_key': int(date_obj.strftime('%Y%m%d')),
-                        'full_date': date_str,
-                        'year': date_obj.year,
-                        'quarter': (date_obj.month - 1) // 3 + 1,
-                        'quarter_name': f"Q{(date_obj.month - 1) // 3 + 1} {date_obj.year}",
-                        'month': date_obj.month,
-                        'month_name': date_obj.strftime('%B'),
-                        'week_of_year': date_obj.isocalendar()[1],
-                        'week_start_date': (date_obj - timedelta(days=date_obj.weekday())).strftime('%Y-%m-%d'),
-                        'week_end_date': (date_obj + timedelta(days=6 - date_obj.weekday())).strftime('%Y-%m-%d'),
-                        'bestsellers_date': clean_date(results.get('bestsellers_date')),
-                        'published_date': clean_date(date_str),
-                        'previous_published_date': clean_date(results.get('previous_published_date')),
-                        'next_published_date': clean_date(results.get('next_published_date'))
-                    })
-
-        for book_list in results.get('lists', []):
-            # Transform lists
-            transformed['lists'].append({
-                'list_id': book_list['list_id'],
-                'list_name': book_list['list_name'],
-                'display_name': book_list['display_name'],
-                'update_frequency': book_list['updated'],
-                'list_image_url': book_list.get('list_image', ''),
-                'effective_start_date': datetime.now().date()
-            })
-
-            for book in book_list.get('books', []):
-                # Transform publishers
-                transformed['publishers'].add(book['publisher'])
-                
-                # Transform books
-                transformed['books'].append({
-                    'title': book['title'],
-                    'author': book['author'],
-                    'contributor': book['contributor'],
-                    'contributor_note': book['contributor_note'],
-                    'age_group': book['age_group'],
-                    'publisher': book['publisher'],
-                    'primary_isbn13': book['primary_isbn13'],
-                    'primary_isbn10': book['primary_isbn10'],
-                    'description': book.get('description', ''),
-                    'created_date': datetime.strptime(book['created_date'], '%Y-%m-%d %H:%M:%S'),
-                    'updated_date': datetime.strptime(book['updated_date'], '%Y-%m-%d %H:%M:%S'),
-                    'effective_start_date': datetime.now().date()
-                })
-
-                # Transform rankings
-                transformed['rankings'].append({
-                    'isbn13': book['primary_isbn13'],
-                    'list_id': book_list['list_id'],
-                    'rank': book['rank'],
-                    'price': book['price'],
-                    'published_date': results['published_date']
-                })
-
-        # Convert publishers set to list of dicts
-        transformed['publishers'] = [{'publisher_name': p} for p in transformed['publishers']]
-        
+        transformed = collect_records(iter_records(raw_data, run_date))
         logger.info("Data transformation completed successfully.")
         return transformed
 
     except Exception as e:
-        logger.error(f"Data transformation failed: {e}")
-        raise
\ No newline at end of file
+        logger.error("Data transformation failed: %s", e)
+        raise
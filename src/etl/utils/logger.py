@@ -1,36 +1,200 @@
 # src/etl/utils/logger.py
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
 
 # Define the log directory and file
 LOG_DIR = os.path.join(os.path.dirname(__file__), '../../../data/logs')
-LOG_FILE = os.path.join(LOG_DIR, 'etl_logs.txt')
+LOG_FILE = os.getenv('LOG_FILE') or os.path.join(LOG_DIR, 'etl_logs.txt')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # 'json' lines or plain 'text'
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(50 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
 
-# Ensure the log directory exists
-os.makedirs(LOG_DIR, exist_ok=True)
+LOGGER_NAME = 'ETL_Logger'
 
-# Configure logging
-def get_logger():
-    logger = logging.getLogger('ETL_Logger')
-    logger.setLevel(logging.INFO)
-
-    # Avoid adding multiple handlers if the logger is called multiple times
-    if not logger.handlers:
-        # Create a file handler
-        file_handler = logging.FileHandler(LOG_FILE)
-        file_handler.setLevel(logging.INFO)
-
-        # Create a console handler for debugging
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-
-        # Define the logging format
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+# One id per process so every line of a run can be correlated; date and stage
+# are per task and follow the code that sets them through log_context().
+RUN_ID = os.getenv('RUN_ID') or uuid.uuid4().hex[:12]
+_date = contextvars.ContextVar('log_date', default=None)
+_stage = contextvars.ContextVar('log_stage', default=None)
+
+_listener = None
+# Writes records that child processes put on a multiprocessing queue
+_child_listener = None
+_child = False
+
+
+class ContextFilter(logging.Filter):
+    """Stamp run_id, date and stage on records in the thread that logs them."""
+
+    def filter(self, record):
+        record.run_id = RUN_ID
+        record.date = _date.get()
+        record.stage = _stage.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'run_id': getattr(record, 'run_id', RUN_ID),
+            'date': getattr(record, 'date', None),
+            'stage': getattr(record, 'stage', None),
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _formatter():
+    if LOG_FORMAT == 'text':
+        return logging.Formatter('%(asctime)s - %(levelname)s - [%(run_id)s %(date)s %(stage)s] %(message)s')
+    return JsonFormatter()
+
+
+def _level(level):
+    level = level or LOG_LEVEL
+    return level.upper() if isinstance(level, str) else level
+
+
+def _reset_handlers(logger, level):
+    logger.setLevel(_level(level))
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+
+def _stop_listeners():
+    global _listener, _child_listener
+    if _child_listener is not None:
+        _child_listener.stop()
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def configure_logging(log_file=None, level=None):
+    """(Re)build the handlers behind the queue.
+
+    Callers only ever enqueue records; a QueueListener thread does the
+    formatting and the file and console writes, so log I/O never blocks the
+    extract or load workers. Entry points call this (or get_logger with
+    log_file/level) to pick their own destination and level.
+
+    Only the main process writes the log file: a second RotatingFileHandler
+    on it would race rotations. Child processes log to stderr until
+    configure_child_logging points them at the parent's listener.
+    """
+    global _listener, _child_listener
+    logger = logging.getLogger(LOGGER_NAME)
+    child_queue = _child_listener.queue if _child_listener is not None else None
+    _stop_listeners()
+    _reset_handlers(logger, level)
+
+    formatter = _formatter()
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+    if multiprocessing.parent_process() is None:
+        log_file = log_file or LOG_FILE
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        # Rotate by size so long historical loads can't fill the disk
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
         file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+        handlers.insert(0, file_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+    if child_queue is not None:
+        _child_listener = logging.handlers.QueueListener(child_queue, *handlers)
+        _child_listener.start()
+    return logger
+
+
+def child_log_queue(context):
+    """A queue for child processes started from context to log into.
+
+    Pass it to configure_child_logging in each child; this process writes
+    their records with its own handlers, to the same file and console.
+    """
+    global _child_listener
+    if _listener is None:
+        configure_logging()
+    if _child_listener is None:
+        _child_listener = logging.handlers.QueueListener(context.Queue(), *_listener.handlers)
+        _child_listener.start()
+    return _child_listener.queue
+
 
-        # Add handlers to the logger
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+def configure_child_logging(log_queue, level=None):
+    """In a child process, send every record to the parent's child_log_queue."""
+    global _child
+    logger = logging.getLogger(LOGGER_NAME)
+    _stop_listeners()
+    _reset_handlers(logger, level)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+    _child = True
+    return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener threads."""
+    global _child_listener
+    _stop_listeners()
+    _child_listener = None
+
+atexit.register(shutdown_logging)
+
+
+@contextmanager
+def log_context(date=None, stage=None):
+    """Tag records logged inside the block with a date and/or stage."""
+    tokens = []
+    if date is not None:
+        tokens.append((_date, _date.set(str(date))))
+    if stage is not None:
+        tokens.append((_stage, _stage.set(stage)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+# Configure logging
+def get_logger(name=None, log_file=None, level=None):
+    """Return the ETL logger, or a child of it when name is given.
 
-    return logger
\ No newline at end of file
+    Passing log_file or level reconfigures the shared handlers, which is how
+    entry points choose where and how much to log.
+    """
+    if (_listener is None and not _child) or log_file or level:
+        configure_logging(log_file=log_file, level=level)
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
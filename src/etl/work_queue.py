@@ -0,0 +1,250 @@
+# work_queue.py
+import os
+import socket
+import threading
+import time
+from src.etl.database import get_db_connection
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+# A claim is valid for QUEUE_LEASE_SECONDS and heartbeats renew it, so a
+# crashed worker's date is reclaimed once its lease runs out.
+QUEUE_LEASE_SECONDS = int(os.getenv('QUEUE_LEASE_SECONDS', '300'))
+QUEUE_HEARTBEAT_SECONDS = int(os.getenv('QUEUE_HEARTBEAT_SECONDS', '30'))
+QUEUE_MAX_ATTEMPTS = int(os.getenv('QUEUE_MAX_ATTEMPTS', '5'))
+
+
+def worker_name():
+    """Default worker id: host and process, unique across nodes."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_dates(conn, dates, requeue_failed=False):
+    """Add requested dates to the queue; dates already queued are left alone.
+
+    With requeue_failed, dates that exhausted their attempts go back to PENDING.
+    Returns the number of dates added or re-queued.
+    """
+    conflict = '''
+        DO UPDATE SET status = 'PENDING', attempts = 0, last_error = NULL, updated_at = NOW()
+        WHERE load_queue.status = 'FAILED'
+    ''' if requeue_failed else 'DO NOTHING'
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''
+            INSERT INTO load_queue (requested_date)
+            SELECT unnest(%s::date[])
+            ON CONFLICT (requested_date) {conflict}
+        ''', (list(dates),))
+        enqueued = cursor.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    logger.info("Enqueued %d dates.", enqueued)
+    return enqueued
+
+
+def reclaim_expired(conn, max_attempts=QUEUE_MAX_ATTEMPTS):
+    """Hand dates whose lease expired back to the queue.
+
+    Their load_status rows still marked IN_PROGRESS by the dead worker are
+    marked FAILED in the same transaction. Returns the reclaimed dates.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            WITH expired AS (
+                UPDATE load_queue SET
+                    status = CASE WHEN attempts >= %s THEN 'FAILED' ELSE 'PENDING' END,
+                    last_error = 'Lease held by ' || claimed_by || ' expired',
+                    claimed_by = NULL,
+                    lease_expires_at = NULL,
+                    updated_at = NOW()
+                WHERE status = 'CLAIMED' AND lease_expires_at < NOW()
+                RETURNING requested_date, last_error
+            ),
+            abandoned AS (
+                UPDATE load_status ls SET
+                    status = 'FAILED',
+                    error_message = expired.last_error,
+                    updated_at = NOW()
+                FROM expired
+                WHERE ls.requested_date = expired.requested_date
+                  AND ls.status = 'IN_PROGRESS'
+            )
+            SELECT requested_date FROM expired
+        ''', (max_attempts,))
+        reclaimed = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    if reclaimed:
+        logger.warning("Reclaimed %d dates with expired leases: %s", len(reclaimed), reclaimed)
+    return reclaimed
+
+
+def claim_date(conn, worker_id, lease_seconds=QUEUE_LEASE_SECONDS):
+    """Claim the earliest pending date, or return None when nothing is pending.
+
+    SKIP LOCKED lets any number of workers claim concurrently without waiting
+    on each other's row locks.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            WITH next_date AS (
+                SELECT requested_date FROM load_queue
+                WHERE status = 'PENDING'
+                ORDER BY requested_date
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE load_queue q SET
+                status = 'CLAIMED',
+                claimed_by = %s,
+                attempts = q.attempts + 1,
+                claimed_at = NOW(),
+                heartbeat_at = NOW(),
+                lease_expires_at = NOW() + make_interval(secs => %s),
+                updated_at = NOW()
+            FROM next_date
+            WHERE q.requested_date = next_date.requested_date
+            RETURNING q.requested_date
+        ''', (worker_id, lease_seconds))
+        row = cursor.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return row[0] if row else None
+
+
+def renew_lease(conn, worker_id, requested_date, lease_seconds=QUEUE_LEASE_SECONDS):
+    """Extend a claim; returns False if the worker no longer holds it."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            UPDATE load_queue SET
+                heartbeat_at = NOW(),
+                lease_expires_at = NOW() + make_interval(secs => %s)
+            WHERE requested_date = %s AND claimed_by = %s AND status = 'CLAIMED'
+        ''', (lease_seconds, requested_date, worker_id))
+        renewed = cursor.rowcount == 1
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return renewed
+
+
+def finish_date(conn, worker_id, requested_date, success, error_message=None, max_attempts=QUEUE_MAX_ATTEMPTS):
+    """Release a claim as DONE, or back to PENDING/FAILED after an error."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            UPDATE load_queue SET
+                status = CASE
+                    WHEN %s THEN 'DONE'
+                    WHEN attempts >= %s THEN 'FAILED'
+                    ELSE 'PENDING'
+                END,
+                last_error = %s,
+                claimed_by = NULL,
+                lease_expires_at = NULL,
+                updated_at = NOW()
+            WHERE requested_date = %s AND claimed_by = %s
+        ''', (success, max_attempts, error_message, requested_date, worker_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def queue_counts(conn):
+    """Number of queued dates per status."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT status, COUNT(*) FROM load_queue GROUP BY status")
+        counts = dict(cursor.fetchall())
+        conn.commit()
+    finally:
+        cursor.close()
+    return counts
+
+
+class LeaseHeartbeat:
+    """Renew a claim from a background thread while the date is processed.
+
+    Uses its own connection: the worker's connection is inside the load
+    transaction, and committing a heartbeat there would commit the load too.
+    Failed renewals are retried on a fresh connection until the lease would
+    have expired. The lease is then lost: `lost` is set and, when the worker's
+    connection is given as cancel_conn, its running statement is cancelled so
+    the load stops instead of racing the worker that reclaims the date.
+    """
+
+    def __init__(self, worker_id, requested_date, interval=QUEUE_HEARTBEAT_SECONDS,
+                 lease_seconds=QUEUE_LEASE_SECONDS, cancel_conn=None):
+        self.worker_id = worker_id
+        self.requested_date = requested_date
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.cancel_conn = cancel_conn
+        self.stopped = threading.Event()
+        self.lost = False
+        self.thread = threading.Thread(target=self._run, name=f"heartbeat-{requested_date}", daemon=True)
+
+    def _lose(self, reason):
+        self.lost = True
+        logger.warning("Lost the lease on %s: %s", self.requested_date, reason)
+        if self.cancel_conn is not None and not self.cancel_conn.closed:
+            try:
+                self.cancel_conn.cancel()
+            except Exception as e:
+                logger.error("Could not cancel the load of %s: %s", self.requested_date, e)
+
+    def _run(self):
+        conn = None
+        renewed_at = time.monotonic()
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    if conn is None or conn.closed:
+                        conn = get_db_connection()
+                    if not renew_lease(conn, self.worker_id, self.requested_date, self.lease_seconds):
+                        self._lose("claimed by another worker")
+                        return
+                    renewed_at = time.monotonic()
+                except Exception as e:
+                    logger.warning("Heartbeat for %s failed: %s", self.requested_date, e)
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+                    if time.monotonic() - renewed_at >= self.lease_seconds:
+                        self._lose("renewals failed until the lease expired")
+                        return
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        return False
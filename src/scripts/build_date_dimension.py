@@ -0,0 +1,40 @@
+# Build the dim_date calendar and link days to their publication
+import argparse
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+from src.etl.date_dimension import backfill_publication_links, build_calendar
+from src.etl.database import get_db_connection
+from src.etl.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger()
+
+CALENDAR_START_DATE = os.getenv('CALENDAR_START_DATE', '2008-01-01')
+CALENDAR_END_DATE = os.getenv('CALENDAR_END_DATE') or f"{datetime.today().year + 1}-12-31"
+
+
+def build(start_date, end_date):
+    """Precompute dim_date for a date range, then back-fill publication links."""
+    conn = get_db_connection()
+    logger.info("🚀 Building dim_date from %s to %s", start_date, end_date)
+
+    try:
+        build_calendar(conn, start_date, end_date)
+        backfill_publication_links(conn, start_date, end_date)
+        logger.info("🎉 dim_date calendar is complete")
+
+    finally:
+        conn.close()
+        logger.info("🔒 Database connection closed.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the dim_date calendar.")
+    parser.add_argument('--start', default=CALENDAR_START_DATE, help="First day (YYYY-MM-DD)")
+    parser.add_argument('--end', default=CALENDAR_END_DATE, help="Last day (YYYY-MM-DD)")
+    args = parser.parse_args()
+    build(
+        datetime.strptime(args.start, '%Y-%m-%d').date(),
+        datetime.strptime(args.end, '%Y-%m-%d').date()
+    )
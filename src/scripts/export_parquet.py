@@ -0,0 +1,28 @@
+# Export the star schema to Parquet for analytical reads
+import argparse
+from src.etl.export import EXPORT_DIR, export_star_schema
+from src.etl.database import get_db_connection
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def export(export_dir=EXPORT_DIR, full=False):
+    """Stream the warehouse into year/quarter-partitioned Parquet files."""
+    conn = get_db_connection()
+    logger.info("🚀 Starting %s Parquet export to %s", 'full' if full else 'incremental', export_dir)
+
+    try:
+        counts = export_star_schema(conn, export_dir, full=full)
+        logger.info("🎉 Parquet export completed: %s", counts)
+
+    finally:
+        conn.close()
+        logger.info("🔒 Database connection closed.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the star schema to Parquet.")
+    parser.add_argument('--output', default=EXPORT_DIR, help="Export directory")
+    parser.add_argument('--full', action='store_true', help="Ignore watermarks and re-export all facts")
+    args = parser.parse_args()
+    export(args.output, full=args.full)
@@ -0,0 +1,25 @@
+# Rebuild fact_publisher_performance from fact_book_rankings
+from src.etl.load import rebuild_publisher_performance
+from src.etl.database import get_db_connection
+from src.etl.rollups import refresh_rollups
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def rebuild():
+    """Run a full fact_publisher_performance rebuild."""
+    conn = get_db_connection()
+    logger.info("🚀 Starting fact_publisher_performance rebuild")
+
+    try:
+        rebuild_publisher_performance(conn)
+        refresh_rollups(conn, {'fact_publisher_performance'})
+        logger.info("🎉 fact_publisher_performance rebuild completed")
+
+    finally:
+        conn.close()
+        logger.info("🔒 Database connection closed.")
+
+if __name__ == "__main__":
+    rebuild()
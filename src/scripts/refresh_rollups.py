@@ -0,0 +1,23 @@
+# Refresh every dashboard rollup
+from src.etl.rollups import refresh_rollups
+from src.etl.database import get_db_connection
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def refresh():
+    """Refresh all materialized rollups concurrently."""
+    conn = get_db_connection()
+    logger.info("🚀 Refreshing dashboard rollups")
+
+    try:
+        refreshed = refresh_rollups(conn)
+        logger.info("🎉 Refreshed %d rollups", len(refreshed))
+
+    finally:
+        conn.close()
+        logger.info("🔒 Database connection closed.")
+
+if __name__ == "__main__":
+    refresh()
@@ -0,0 +1,26 @@
+# Rebuild indexes and foreign keys left deferred by an interrupted fast backfill
+from src.etl.database import get_db_connection
+from src.etl.fast_backfill import restore_deferred
+from src.etl.load import analyze_tables
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def restore():
+    """Restore every object recorded in deferred_schema_objects."""
+    conn = get_db_connection()
+    logger.info("🚀 Restoring deferred indexes and foreign keys")
+
+    try:
+        restored = restore_deferred(conn)
+        if restored:
+            analyze_tables(conn)
+        logger.info("🎉 Restored %d indexes and foreign keys", restored)
+
+    finally:
+        conn.close()
+        logger.info("🔒 Database connection closed.")
+
+if __name__ == "__main__":
+    restore()
@@ -0,0 +1,60 @@
+# Rebuild the warehouse from archived NYT overview responses
+import argparse
+import os
+from datetime import date, datetime
+from dotenv import load_dotenv
+from src.etl.archive import ARCHIVE_BATCH_SIZE, ARCHIVE_WORKERS, import_archive
+from src.etl.database import get_db_connection
+from src.etl.date_dimension import backfill_publication_links, build_calendar
+from src.etl.fast_backfill import restore_deferred
+from src.etl.instrumentation import log_sql_summary
+from src.etl.load import analyze_tables
+from src.etl.migrate import ensure_fact_partitions, run_migrations
+from src.etl.rollups import REFRESH_ROLLUPS, refresh_rollups
+from src.etl.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger()
+
+# Apply pending schema migrations before loading
+AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'true').lower() == 'true'
+CALENDAR_START_DATE = os.getenv('CALENDAR_START_DATE', '2008-01-01')
+
+
+def import_responses(source, batch_size=ARCHIVE_BATCH_SIZE, workers=ARCHIVE_WORKERS):
+    """Import a directory or tarball of overview responses."""
+    logger.info("🚀 Importing archived responses from %s", source)
+    calendar_start = datetime.strptime(CALENDAR_START_DATE, '%Y-%m-%d').date()
+    calendar_end = date(datetime.today().year, 12, 31)
+
+    conn = get_db_connection()
+    try:
+        if AUTO_MIGRATE:
+            run_migrations(conn)
+        ensure_fact_partitions(conn, calendar_start.year, calendar_end.year + 1)
+        build_calendar(conn, calendar_start, calendar_end)
+        # Put back anything an interrupted fast backfill left deferred
+        restore_deferred(conn)
+
+        loaded, failed, skipped, touched = import_archive(conn, source, batch_size, workers)
+
+        if loaded:
+            backfill_publication_links(conn, calendar_start, calendar_end)
+            analyze_tables(conn)
+            if REFRESH_ROLLUPS:
+                refresh_rollups(conn, touched)
+        logger.info("🎉 Archive import completed. Loaded: %d, Failed: %d, Already loaded: %d", loaded, failed, skipped)
+
+    finally:
+        conn.close()
+        logger.info("🔒 Database connection closed.")
+        log_sql_summary()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import archived overview responses.")
+    parser.add_argument('source', help="Directory or tarball of JSON (or .json.gz) responses")
+    parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help="Payloads per load batch")
+    parser.add_argument('--workers', type=int, default=ARCHIVE_WORKERS, help="Transform processes")
+    args = parser.parse_args()
+    import_responses(args.source, args.batch_size, args.workers)
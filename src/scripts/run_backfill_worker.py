@@ -0,0 +1,189 @@
+# Distributed backfill: a coordinator enqueues dates, workers claim and load them
+import argparse
+import multiprocessing
+import os
+import time
+from datetime import date, datetime, timedelta
+from dotenv import load_dotenv
+from src.etl.database import get_db_connection
+from src.etl.date_dimension import backfill_publication_links, build_calendar
+from src.etl.extract import flush_response_cache
+from src.etl.fast_backfill import restore_deferred
+from src.etl.instrumentation import log_sql_summary
+from src.etl.key_cache import key_cache
+from src.etl.migrate import ensure_fact_partitions, run_migrations
+from src.etl.pipeline import process_date
+from src.etl.planner import PublicationPlanner, calendar_dates
+from src.etl.rate_limit import TokenBucket
+from src.etl.rollups import REFRESH_ROLLUPS, refresh_rollups
+from src.etl.work_queue import (
+    QUEUE_HEARTBEAT_SECONDS, LeaseHeartbeat, claim_date, enqueue_dates, finish_date,
+    queue_counts, reclaim_expired, worker_name
+)
+from src.etl.utils.logger import child_log_queue, configure_child_logging, get_logger
+
+load_dotenv()
+
+logger = get_logger()
+
+# The API quota is per key, so it is split across every worker process that
+# shares it, on this node and others: --processes on each of BACKFILL_NODES
+# nodes, unless BACKFILL_WORKERS gives the total.
+BACKFILL_NODES = int(os.getenv('BACKFILL_NODES', '1'))
+BACKFILL_WORKERS = os.getenv('BACKFILL_WORKERS')
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', '5'))  # requests per minute, all workers
+API_RATE_BURST = int(os.getenv('API_RATE_BURST', '1'))
+QUEUE_POLL_SECONDS = float(os.getenv('QUEUE_POLL_SECONDS', '10'))
+
+PLAN_PUBLICATION_DATES = os.getenv('PLAN_PUBLICATION_DATES', 'true').lower() == 'true'
+AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'true').lower() == 'true'
+
+
+def coordinate(requeue_failed=False):
+    """Prepare the warehouse and enqueue the configured date range."""
+    start_date = datetime.strptime(os.getenv('start_date'), '%Y-%m-%d').date()
+    end_date = datetime.strptime(os.getenv('end_date'), '%Y-%m-%d').date()
+    logger.info("🚀 Enqueuing backfill from %s to %s", start_date, end_date)
+
+    conn = get_db_connection()
+    try:
+        if AUTO_MIGRATE:
+            run_migrations(conn)
+        ensure_fact_partitions(conn, start_date.year, end_date.year + 1)
+        build_calendar(conn, date(start_date.year, 1, 1), date(end_date.year, 12, 31))
+        # Put back anything an interrupted fast backfill left deferred
+        restore_deferred(conn)
+        if PLAN_PUBLICATION_DATES:
+            dates = PublicationPlanner.from_database(conn, start_date, end_date).dates()
+        else:
+            dates = calendar_dates(start_date, end_date)
+        enqueue_dates(conn, list(dates), requeue_failed=requeue_failed)
+        logger.info("📋 Queue: %s", queue_counts(conn))
+    finally:
+        conn.close()
+        logger.info("🔒 Database connection closed.")
+
+def total_workers(processes):
+    """Worker processes sharing the API key, never fewer than run on this node."""
+    if BACKFILL_WORKERS:
+        return max(int(BACKFILL_WORKERS), processes)
+    return processes * BACKFILL_NODES
+
+def run_worker(worker_id=None, replay=False, exit_when_empty=False, workers=1):
+    """Claim and load dates until stopped, or until the queue drains.
+
+    workers is the number of processes sharing the API quota.
+    """
+    worker_id = worker_id or worker_name()
+    rate_limiter = TokenBucket(API_RATE_LIMIT / workers, per=60.0, capacity=API_RATE_BURST)
+    touched = set()
+    loaded_dates = []
+    last_reclaim = 0.0
+    conn = get_db_connection()
+    logger.info("👷 Backfill worker %s started", worker_id)
+
+    try:
+        while True:
+            if conn.closed:
+                conn = get_db_connection()
+
+            try:
+                if time.monotonic() - last_reclaim >= QUEUE_HEARTBEAT_SECONDS:
+                    reclaim_expired(conn)
+                    last_reclaim = time.monotonic()
+                target_date = claim_date(conn, worker_id)
+            except Exception as e:
+                logger.error("❌ Queue access failed: %s", e)
+                conn.close()
+                time.sleep(QUEUE_POLL_SECONDS)
+                continue
+
+            if target_date is None:
+                # Link calendar days and refresh rollups once the queue drains
+                # rather than per date; on failure they are retried next poll
+                try:
+                    if loaded_dates:
+                        backfill_publication_links(conn, min(loaded_dates), max(loaded_dates) + timedelta(days=7))
+                        loaded_dates.clear()
+                    if REFRESH_ROLLUPS and touched:
+                        refresh_rollups(conn, touched)
+                        touched.clear()
+                    if exit_when_empty and not queue_counts(conn).get('CLAIMED'):
+                        break
+                except Exception as e:
+                    logger.error("❌ Post-backfill maintenance failed: %s", e)
+                    if not conn.closed:
+                        conn.rollback()
+                time.sleep(QUEUE_POLL_SECONDS)
+                continue
+
+            # Other processes may have versioned dimension rows since the last
+            # date, so surrogate keys are re-read instead of trusted from cache
+            key_cache.clear()
+            # A lost lease cancels the load's running statement
+            with LeaseHeartbeat(worker_id, target_date, cancel_conn=conn) as heartbeat:
+                try:
+                    success = process_date(conn, target_date, rate_limiter=rate_limiter,
+                                           replay=replay, touched=touched)
+                except Exception as e:
+                    logger.error("❌ Error processing %s: %s", target_date, e)
+                    success = False
+
+            if success:
+                loaded_dates.append(target_date)
+            if conn.closed:
+                conn = get_db_connection()
+            if heartbeat.lost:
+                # The date was or will be reclaimed; its new owner finishes it
+                logger.warning("⚠️ Lease on %s was lost; leaving it to the queue", target_date)
+                continue
+            try:
+                finish_date(conn, worker_id, target_date, success,
+                            None if success else "Load failed; see load_status")
+            except Exception as e:
+                # The lease expires and the date is retried
+                logger.error("❌ Could not release %s: %s", target_date, e)
+    finally:
+        conn.close()
+        flush_response_cache()
+        logger.info("🔒 Backfill worker %s stopped.", worker_id)
+        log_sql_summary()
+
+def _worker_process(index, replay, exit_when_empty, workers, log_queue, log_level):
+    # Records go to the parent, the only process writing the log file
+    configure_child_logging(log_queue, log_level)
+    run_worker(f"{worker_name()}-{index}", replay=replay, exit_when_empty=exit_when_empty, workers=workers)
+
+def run_workers(processes, replay=False, exit_when_empty=False):
+    """Run several workers on this node, one process each."""
+    workers = total_workers(processes)
+    logger.info("⏱️ Each worker gets 1/%d of the API rate limit", workers)
+    if processes == 1:
+        run_worker(replay=replay, exit_when_empty=exit_when_empty, workers=workers)
+        return
+    # Spawned rather than forked so no connection or logging thread is shared
+    context = multiprocessing.get_context('spawn')
+    log_queue = child_log_queue(context)
+    children = [
+        context.Process(target=_worker_process, args=(i, replay, exit_when_empty, workers, log_queue, logger.level),
+                        name=f"backfill-worker-{i}")
+        for i in range(processes)
+    ]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed backfill over a Postgres work queue.")
+    parser.add_argument('--enqueue', action='store_true', help="Enqueue start_date..end_date and exit")
+    parser.add_argument('--requeue-failed', action='store_true', help="With --enqueue, retry dates that failed")
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes to run on this node")
+    parser.add_argument('--exit-when-empty', action='store_true', help="Stop once no dates are pending or claimed")
+    parser.add_argument('--replay', action='store_true', help="Load from cached responses only")
+    args = parser.parse_args()
+
+    if args.enqueue:
+        coordinate(requeue_failed=args.requeue_failed)
+    else:
+        run_workers(args.processes, replay=args.replay, exit_when_empty=args.exit_when_empty)
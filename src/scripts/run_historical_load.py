@@ -1,13 +1,24 @@
 # historical_load.py
-import time
+import argparse
 import os
-from datetime import datetime, timedelta
+import queue
+import threading
+from datetime import date, datetime
 import yaml
 from dotenv import load_dotenv
-from src.etl.extract import extract_data
-from src.etl.transform import transform_data
-from src.etl.load import load_data
-from src.etl.database import get_db_connection
+from src.etl.date_dimension import backfill_publication_links, build_calendar
+from src.etl.extract import client_stats, flush_response_cache
+from src.etl.fast_backfill import defer_secondary_objects, restore_deferred
+from src.etl.instrumentation import log_sql_summary
+from src.etl.pipeline import extract_payload, load_payload, load_payloads_batched
+from src.etl.key_cache import key_cache
+from src.etl.load import analyze_tables
+from src.etl import metrics
+from src.etl.migrate import ensure_fact_partitions, run_migrations
+from src.etl.rollups import REFRESH_ROLLUPS, refresh_rollups
+from src.etl.planner import PublicationPlanner, calendar_dates
+from src.etl.rate_limit import TokenBucket
+from src.etl.database import DB_POOL_MAX, close_pool, init_pool, pooled_connection
 from src.etl.utils.logger import get_logger
 
 
@@ -15,141 +26,193 @@ load_dotenv()
 
 logger = get_logger()
 
+# Pipeline sizing. The NYT Books API allows 5 requests per minute per key.
+EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', '4'))
+LOAD_WORKERS = int(os.getenv('LOAD_WORKERS', '1'))
+QUEUE_DEPTH = int(os.getenv('QUEUE_DEPTH', '8'))
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', '5'))  # requests per minute
+API_RATE_BURST = int(os.getenv('API_RATE_BURST', '1'))
 
+# Request only publication dates that still need loading instead of every day
+PLAN_PUBLICATION_DATES = os.getenv('PLAN_PUBLICATION_DATES', 'true').lower() == 'true'
 
-def check_if_date_loaded(conn, bestsellers_date):
-    """Check if data for the bestsellers date has already been loaded."""
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT status, updated_at 
-            FROM load_status 
-            WHERE bestsellers_date = %s
-            ORDER BY updated_at DESC
-            LIMIT 1;
-        """, (bestsellers_date,))
-        result = cursor.fetchone()
-        cursor.close()
-        return result[0] if result else None
-    except Exception as e:
-        logger.error(f"❌ Error checking load status: {e}")
-        conn.rollback()
-        return None
-
-def update_load_status(conn, requested_date, bestsellers_date, status, error_message=None):
-    """Update load status with error tracking."""
-    try:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO load_status (
-                requested_date, 
-                bestsellers_date, 
-                status, 
-                error_message,
-                updated_at
-            )
-            VALUES (%s, %s, %s, %s, NOW())
-            ON CONFLICT (requested_date, bestsellers_date) 
-            DO UPDATE SET
-                status = EXCLUDED.status,
-                error_message = EXCLUDED.error_message,
-                updated_at = NOW();
-        ''', (requested_date, bestsellers_date, status, error_message))
-        conn.commit()
-        cursor.close()
-    except Exception as e:
-        logger.error(f"❌ Error updating load status: {e}")
-        conn.rollback()
-
-def extract_with_retry(date, max_retries=3, initial_delay=5):
-    """Enhanced retry logic with exponential backoff."""
-    for attempt in range(max_retries):
+# Dates committed per transaction by each loader; 1 keeps one transaction per date
+COMMIT_BATCH_SIZE = int(os.getenv('COMMIT_BATCH_SIZE', '1'))
+
+# Apply pending schema migrations before loading
+AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'true').lower() == 'true'
+
+_DONE = object()
+
+
+def extractor_worker(dates, dates_lock, planner, payloads, rate_limiter, replay):
+    """Fetch dates until none are left, handing payloads to the loaders."""
+    while True:
+        with dates_lock:
+            target_date = next(dates, None)
+        if target_date is None:
+            return
+        metrics.WORKERS_IN_FLIGHT.labels('extract').inc()
         try:
-            logger.info(f"🔍 Extracting data for {date} (Attempt {attempt + 1})")
-            data = extract_data(date)
-            if not data.get('results'):
-                raise ValueError("No results in API response")
-            return data
+            raw_data = extract_payload(target_date.strftime('%Y-%m-%d'), rate_limiter=rate_limiter, replay=replay)
+            if planner:
+                planner.observe(target_date, raw_data)
+        finally:
+            metrics.WORKERS_IN_FLIGHT.labels('extract').dec()
+        payloads.put((target_date, raw_data))
+        metrics.QUEUE_DEPTH.labels('payloads').set(payloads.qsize())
+
+def loader_worker(payloads, results, touched):
+    """Load extracted payloads, each on a connection checked out from the pool.
+
+    A dropped connection only fails the payload that was using it; the next
+    checkout gets a fresh, health-checked connection. Tables written are
+    collected in touched so rollups are refreshed once at the end.
+    """
+    if COMMIT_BATCH_SIZE > 1:
+        return _batched_loader_worker(payloads, results, touched)
+    while True:
+        item = payloads.get()
+        metrics.QUEUE_DEPTH.labels('payloads').set(payloads.qsize())
+        if item is _DONE:
+            return
+        target_date, raw_data = item
+        metrics.WORKERS_IN_FLIGHT.labels('load').inc()
+        try:
+            with pooled_connection() as conn:
+                results.append(load_payload(conn, target_date, raw_data, touched=touched))
         except Exception as e:
-            delay = initial_delay * (2 ** attempt)
-            if attempt < max_retries - 1:
-                logger.warning(f"⚠️ Attempt {attempt + 1} failed: {e}. Retrying in {delay}s...")
-                time.sleep(delay)
-            else:
-                logger.error(f"❌ All attempts failed for {date}: {e}")
-                return None
-
-def process_date(conn, target_date):
-    """Process a single date with comprehensive error handling."""
-    bestsellers_date = None
-    try:
-        # Extract
-        raw_data = extract_with_retry(target_date.strftime('%Y-%m-%d'))
-        if not raw_data:
-            raise Exception("Data extraction failed")
-
-        # Get bestsellers date
-        bestsellers_date = raw_data.get('results', {}).get('bestsellers_date')
-        if not bestsellers_date:
-            raise ValueError("No bestsellers date in response")
-
-        bestsellers_date = datetime.strptime(bestsellers_date, '%Y-%m-%d').date()
-        
-        # Check existing status
-        current_status = check_if_date_loaded(conn, bestsellers_date)
-        if current_status == 'COMPLETED':
-            logger.info(f"✅ Data already loaded for {bestsellers_date}")
-            return True
-        
-        # Process data
-        update_load_status(conn, target_date, bestsellers_date, 'IN_PROGRESS')
-        transformed_data = transform_data(raw_data)
-        load_data(transformed_data, conn)
-        
-        update_load_status(conn, target_date, bestsellers_date, 'COMPLETED')
-        logger.info(f"✅ Successfully processed {bestsellers_date}")
-        return True
-
-    except Exception as e:
-        error_msg = str(e)
-        logger.error(f"❌ Error processing {target_date}: {error_msg}")
-        if bestsellers_date:
-            update_load_status(conn, target_date, bestsellers_date, 'FAILED', error_msg)
-        return False
-
-def historical_load():
-    """Run historical load process."""
+            logger.error("❌ Error loading %s: %s", target_date, e)
+            results.append(False)
+        finally:
+            metrics.WORKERS_IN_FLIGHT.labels('load').dec()
+
+def _batched_loader_worker(payloads, results, touched):
+    """Load up to COMMIT_BATCH_SIZE payloads per transaction."""
+    done = False
+    while not done:
+        batch = []
+        while len(batch) < COMMIT_BATCH_SIZE:
+            item = payloads.get()
+            metrics.QUEUE_DEPTH.labels('payloads').set(payloads.qsize())
+            if item is _DONE:
+                done = True
+                break
+            batch.append(item)
+        if not batch:
+            return
+        metrics.WORKERS_IN_FLIGHT.labels('load').inc()
+        try:
+            with pooled_connection() as conn:
+                results.extend(load_payloads_batched(conn, batch, touched=touched))
+        except Exception as e:
+            logger.error("❌ Error loading %s to %s: %s", batch[0][0], batch[-1][0], e)
+            results.extend([False] * len(batch))
+        finally:
+            metrics.WORKERS_IN_FLIGHT.labels('load').dec()
+
+def historical_load(replay=False, fast=False):
+    """Run historical load process.
+
+    With replay=True every payload is read from the local response cache and
+    the API is never called. With fast=True secondary indexes and foreign keys
+    are dropped for the load and rebuilt once at the end (see fast_backfill.py).
+    """
     # # Load configuration
     # with open('config/config.yml', 'r') as file:
     #     config = yaml.safe_load(file)
     # load_dotenv()
 
-    conn = get_db_connection()
-    logger.info("🚀 Starting historical load")
+    logger.info("🚀 Starting historical load%s", ' (replay from cache)' if replay else '')
     
-    try:
-        # start_date = datetime.strptime(config['load']['start_date'], '%Y-%m-%d').date()
-        # end_date = datetime.strptime(config['load']['end_date'], '%Y-%m-%d').date()
-
-        start_date = datetime.strptime(os.getenv('start_date'), '%Y-%m-%d').date()
-        end_date = datetime.strptime(os.getenv('end_date'), '%Y-%m-%d').date()
-        
-        current_date = start_date
-        success_count = fail_count = 0
-
-        while current_date <= end_date:
-            if process_date(conn, current_date):
-                success_count += 1
-            else:
-                fail_count += 1
-            current_date += timedelta(days=1)
-            time.sleep(1)  # Rate limiting
-
-        logger.info(f"🎉 Historical load completed. Successes: {success_count}, Failures: {fail_count}")
+    # start_date = datetime.strptime(config['load']['start_date'], '%Y-%m-%d').date()
+    # end_date = datetime.strptime(config['load']['end_date'], '%Y-%m-%d').date()
+
+    start_date = datetime.strptime(os.getenv('start_date'), '%Y-%m-%d').date()
+    end_date = datetime.strptime(os.getenv('end_date'), '%Y-%m-%d').date()
+
+    metrics.start_metrics_server()
+    init_pool(maxconn=max(DB_POOL_MAX, LOAD_WORKERS + 1))
+    planner = None
+    with pooled_connection() as conn:
+        if AUTO_MIGRATE:
+            run_migrations(conn)
+        ensure_fact_partitions(conn, start_date.year, end_date.year + 1)
+        # Whole calendar years so dim_date is complete for BI time series
+        build_calendar(conn, date(start_date.year, 1, 1), date(end_date.year, 12, 31))
+        key_cache.warm(conn)
+        if PLAN_PUBLICATION_DATES:
+            planner = PublicationPlanner.from_database(conn, start_date, end_date)
+        if fast:
+            logger.info("⚡ Fast backfill: deferring secondary indexes and foreign keys")
+            defer_secondary_objects(conn)
+        else:
+            # Put back anything an interrupted fast backfill left deferred
+            restore_deferred(conn)
+    dates = planner.dates() if planner else calendar_dates(start_date, end_date)
+    dates_lock = threading.Lock()
+
+    # Extractors share one token bucket; the bounded queue applies backpressure
+    # so date N+1 is fetched while date N loads without buffering the range.
+    rate_limiter = TokenBucket(API_RATE_LIMIT, per=60.0, capacity=API_RATE_BURST)
+    payloads = queue.Queue(maxsize=QUEUE_DEPTH)
+    results = []
+    touched = set()
 
+    try:
+        _run_pipeline(dates, dates_lock, planner, rate_limiter, payloads, results, touched, replay)
     finally:
-        conn.close()
-        logger.info("🔒 Database connection closed.")
+        # Also after a failure or Ctrl-C, so the warehouse keeps its indexes
+        if fast:
+            with pooled_connection() as conn:
+                logger.info("⚡ Fast backfill: rebuilding indexes and validating foreign keys")
+                restore_deferred(conn)
+
+    with pooled_connection() as conn:
+        backfill_publication_links(conn, date(start_date.year, 1, 1), date(end_date.year, 12, 31))
+        analyze_tables(conn)
+        if REFRESH_ROLLUPS and touched:
+            refresh_rollups(conn, touched)
+    close_pool()
+    flush_response_cache()
+    logger.info("🔒 Database connections closed.")
+
+    success_count = sum(1 for result in results if result)
+    fail_count = len(results) - success_count
+    logger.info("🎉 Historical load completed. Successes: %d, Failures: %d", success_count, fail_count)
+    stats = client_stats()
+    if stats:
+        logger.info("📈 API client stats: %s", stats)
+    log_sql_summary()
+    metrics.write_metrics_textfile()
+
+def _run_pipeline(dates, dates_lock, planner, rate_limiter, payloads, results, touched, replay):
+    """Run the extractor and loader threads until every date is loaded."""
+    extractors = [
+        threading.Thread(target=extractor_worker, args=(dates, dates_lock, planner, payloads, rate_limiter, replay), name=f"extractor-{i}")
+        for i in range(EXTRACT_WORKERS)
+    ]
+    loaders = [
+        threading.Thread(target=loader_worker, args=(payloads, results, touched), name=f"loader-{i}")
+        for i in range(LOAD_WORKERS)
+    ]
+    for worker in extractors + loaders:
+        worker.start()
+
+    for worker in extractors:
+        worker.join()
+    for _ in loaders:
+        payloads.put(_DONE)
+    for worker in loaders:
+        worker.join()
 
 if __name__ == "__main__":
-    historical_load()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the historical load.")
+    parser.add_argument('--replay', action='store_true', help="Rebuild from cached responses only")
+    parser.add_argument('--fast-backfill', action='store_true',
+                        help="Initial load: defer secondary indexes and foreign keys until the end")
+    parser.add_argument('--log-level', help="Log level for this run (default: LOG_LEVEL)")
+    parser.add_argument('--log-file', help="Log file for this run (default: LOG_FILE)")
+    args = parser.parse_args()
+    get_logger(log_file=args.log_file, level=args.log_level)
+    historical_load(replay=args.replay, fast=args.fast_backfill)
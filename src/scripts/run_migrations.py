@@ -0,0 +1,22 @@
+# Apply pending schema migrations
+from src.etl.migrate import run_migrations
+from src.etl.database import get_db_connection
+from src.etl.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def migrate():
+    """Bring the warehouse schema up to date."""
+    conn = get_db_connection()
+    logger.info("🚀 Running schema migrations")
+
+    try:
+        run_migrations(conn)
+
+    finally:
+        conn.close()
+        logger.info("🔒 Database connection closed.")
+
+if __name__ == "__main__":
+    migrate()
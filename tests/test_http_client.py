@@ -0,0 +1,94 @@
+import time
+import pytest
+from src.etl import http_client
+from src.etl.http_client import CircuitBreaker, CircuitOpenError, ExtractionError, NYTClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ''
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+def make_client(responses, breaker=None, **kwargs):
+    client = NYTClient('http://stub/overview.json', 'key', circuit_breaker=breaker, **kwargs)
+    queued = list(responses)
+    client.session.get = lambda *args, **kw: queued.pop(0)
+    return client
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    # Let the cool-down pass so the next call is a half-open probe
+    breaker.opened_at = time.monotonic() - breaker.reset_seconds - 1
+
+
+def test_client_error_on_probe_reopens_circuit():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    open_breaker(breaker)
+    client = make_client([FakeResponse(404)], breaker=breaker)
+
+    with pytest.raises(ExtractionError):
+        client.get_overview('2024-01-07')
+
+    assert breaker.probing is False
+    # Opened again, so calls fail fast until the next cool-down...
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    # ...after which another probe is allowed
+    breaker.opened_at = time.monotonic() - breaker.reset_seconds - 1
+    breaker.before_call()
+    assert breaker.probing is True
+
+
+def test_successful_probe_closes_circuit():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    open_breaker(breaker)
+    client = make_client([FakeResponse(200, body={'results': {}})], breaker=breaker)
+
+    assert client.get_overview('2024-01-07') == {'results': {}}
+    assert breaker.opened_at is None
+    assert breaker.probing is False
+
+
+def test_retry_after_is_capped_at_backoff_max(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_client.time, 'sleep', sleeps.append)
+    client = make_client(
+        [FakeResponse(429, headers={'Retry-After': '3600'}), FakeResponse(200, body={'results': {}})],
+        backoff_max=5.0
+    )
+
+    client.get_overview('2024-01-07')
+
+    assert sleeps == [5.0]
+
+
+def test_client_errors_do_not_open_a_closed_circuit():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    client = make_client([FakeResponse(404) for _ in range(3)], breaker=breaker)
+
+    for _ in range(3):
+        with pytest.raises(ExtractionError):
+            client.get_overview('2024-01-07')
+
+    assert breaker.opened_at is None
+    breaker.before_call()
+
+
+def test_no_sleep_after_the_last_attempt(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_client.time, 'sleep', sleeps.append)
+    client = make_client([FakeResponse(503), FakeResponse(503)], max_retries=1,
+                         breaker=CircuitBreaker(failure_threshold=10))
+
+    with pytest.raises(ExtractionError):
+        client.get_overview('2024-01-07')
+
+    assert len(sleeps) == 1
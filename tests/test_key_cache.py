@@ -0,0 +1,35 @@
+from src.etl.key_cache import DimensionKeyCache
+
+
+class NoQueryCursor:
+    def execute(self, *args):
+        raise AssertionError("every key should resolve without a query")
+
+
+def test_savepoint_sees_versions_from_earlier_savepoints():
+    cache = DimensionKeyCache(maxsize=10)
+    cache.update('book', {'9780000000001': 1})
+    batch = cache.begin()
+
+    first = batch.savepoint()
+    first.stage('book', {'9780000000001': 2})
+    first.commit()
+
+    second = batch.savepoint()
+    assert second.resolve(NoQueryCursor(), 'book', ['9780000000001']) == {'9780000000001': 2}
+    # Nothing is published until the batch commits
+    assert cache.get('book', '9780000000001') == 1
+    batch.commit()
+    assert cache.get('book', '9780000000001') == 2
+
+
+def test_discarded_savepoint_leaves_the_batch_untouched():
+    cache = DimensionKeyCache(maxsize=10)
+    batch = cache.begin()
+    batch.stage('list', {1: 10})
+
+    failed = batch.savepoint()
+    failed.stage('list', {1: 11})
+    failed.discard()
+
+    assert batch.savepoint().resolve(NoQueryCursor(), 'list', [1]) == {1: 10}